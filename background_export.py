@@ -0,0 +1,58 @@
+import os
+import json
+import time
+import shutil
+import tempfile
+import subprocess
+
+import bpy
+
+from . import batch_export
+
+# Runs a complete level export in a detached Blender process, so the editor can be used while it runs.
+class BackgroundExport:
+    def __init__(self, context):
+        scene = context.scene
+        self.scene = scene.name
+        self.work_dir = tempfile.mkdtemp(prefix="shatter_background_")
+
+        # The snapshot includes any unsaved changes, the export only ever sees this copy.
+        snapshot_path = os.path.join(self.work_dir, "snapshot.blend")
+        bpy.ops.wm.save_as_mainfile(filepath=snapshot_path, copy=True, check_existing=False)
+
+        # Relative paths would resolve next to the snapshot, so they're made absolute first.
+        settings = {
+            "shatter_export_path" : bpy.path.abspath(scene.shatter_export_path),
+            "shatter_game_path" : bpy.path.abspath(scene.shatter_game_path)
+        }
+
+        job_path = os.path.join(self.work_dir, "job.json")
+        self.result_path = os.path.join(self.work_dir, "result.json")
+        with open(job_path, 'w') as job_file:
+            json.dump({"scenes" : [scene.name], "result_path" : self.result_path, "settings" : settings}, job_file)
+
+        self.export_path = settings["shatter_export_path"] + scene.name + ".sls"
+        self.start = time.perf_counter()
+        self.process = subprocess.Popen(batch_export.GetWorkerCommand(bpy.app.binary_path, snapshot_path, job_path))
+
+    def IsRunning(self):
+        return self.process.poll() == None
+
+    def GetSeconds(self):
+        return time.perf_counter() - self.start
+
+    # Returns the error message of the export, empty when it succeeded.
+    def Finish(self):
+        error = ""
+        try:
+            with open(self.result_path) as result_file:
+                results = json.load(result_file)
+
+            for result in results:
+                if not result["success"]:
+                    error = result["error"]
+        except Exception as e:
+            error = "Blender exited with code " + str(self.process.returncode) + " without a result."
+
+        shutil.rmtree(self.work_dir, ignore_errors=True)
+        return error
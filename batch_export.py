@@ -0,0 +1,173 @@
+# Exports many .blend levels in parallel, each in its own headless Blender process.
+#
+# Usage:
+#   blender -b --python batch_export.py -- [options] levels/*.blend
+#   python batch_export.py --blender /path/to/blender [options] levels/*.blend
+#
+# A JSON report with the timing and result of every exported scene is written to --report, batch_report.json by default.
+import os
+import sys
+import json
+import glob
+import time
+import argparse
+import tempfile
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+
+# The controller also runs outside of Blender, only the worker needs bpy.
+try:
+    import bpy
+except ImportError:
+    bpy = None
+
+package_dir = os.path.dirname(os.path.abspath(__file__))
+package_name = __package__ if __package__ else os.path.basename(package_dir)
+
+def GetWorkerCommand(blender, blend_path, job_path):
+    expression = (
+        "import sys; sys.path.insert(0, " + repr(os.path.dirname(package_dir)) + "); "
+        "import importlib; "
+        "importlib.import_module(" + repr(package_name + ".batch_export") + ").RunBatchWorker(" + repr(job_path) + ")"
+    )
+
+    return [blender, "-b", blend_path, "--python-exit-code", "1", "--python-expr", expression]
+
+def GetBlendFiles(patterns):
+    files = []
+    for pattern in patterns:
+        matches = sorted(glob.glob(pattern, recursive=True))
+        if len(matches) == 0:
+            print("No files found for " + pattern, file=sys.stderr)
+
+        for path in matches:
+            path = os.path.abspath(path)
+            if path not in files:
+                files.append(path)
+
+    return files
+
+def ExportBlendFile(blender, index, blend_path, scenes, timeout, work_dir):
+    job_path = os.path.join(work_dir, "level" + str(index) + ".job.json")
+    result_path = os.path.join(work_dir, "level" + str(index) + ".result.json")
+    with open(job_path, 'w') as job_file:
+        json.dump({"scenes" : scenes, "result_path" : result_path}, job_file)
+
+    start = time.perf_counter()
+    error = ""
+    try:
+        process = subprocess.run(GetWorkerCommand(blender, blend_path, job_path), stdout=subprocess.PIPE, stderr=subprocess.STDOUT, timeout=timeout)
+        if process.returncode != 0:
+            error = "Blender exited with code " + str(process.returncode) + ": " + process.stdout.decode("utf-8", "replace")[-2000:]
+    except subprocess.TimeoutExpired:
+        error = "Timed out after " + str(timeout) + " seconds."
+
+    results = []
+    if os.path.isfile(result_path):
+        with open(result_path) as result_file:
+            results = json.load(result_file)
+
+    if len(results) == 0:
+        results.append({"scene" : "", "success" : False, "seconds" : 0.0, "error" : error if error else "No scenes were exported."})
+
+    return {
+        "file" : blend_path,
+        "seconds" : time.perf_counter() - start,
+        "success" : len(error) == 0 and all(result["success"] for result in results),
+        "error" : error,
+        "scenes" : results
+    }
+
+def RunBatchExport(arguments):
+    parser = argparse.ArgumentParser(description="Exports Shatter levels from many .blend files.")
+    parser.add_argument("files", nargs="+", help=".blend files or glob patterns")
+    parser.add_argument("--scene", action="append", dest="scenes", default=[], help="Scene to export, can be repeated. Defaults to the active scene, use * for all scenes")
+    parser.add_argument("--jobs", type=int, default=os.cpu_count(), help="Number of Blender processes to run at once")
+    parser.add_argument("--blender", default=bpy.app.binary_path if bpy else "blender", help="Blender executable used for the exports")
+    parser.add_argument("--timeout", type=float, default=None, help="Maximum time in seconds for a single .blend file")
+    parser.add_argument("--report", default="batch_report.json", help="File the JSON report is written to")
+    options = parser.parse_args(arguments)
+
+    files = GetBlendFiles(options.files)
+    start = time.perf_counter()
+
+    with tempfile.TemporaryDirectory(prefix="shatter_batch_") as work_dir:
+        with ThreadPoolExecutor(max_workers=max(1, options.jobs)) as executor:
+            levels = list(executor.map(lambda item: ExportBlendFile(options.blender, item[0], item[1], options.scenes, options.timeout, work_dir), enumerate(files)))
+
+    report = {
+        "seconds" : time.perf_counter() - start,
+        "exported" : sum(1 for level in levels if level["success"]),
+        "failed" : sum(1 for level in levels if not level["success"]),
+        "levels" : levels
+    }
+
+    # Blender's own output ends up on stdout as well, so the report always goes to a file.
+    report_path = os.path.abspath(options.report)
+    with open(report_path, 'w') as report_file:
+        json.dump(report, report_file, indent=4)
+
+    print("Exported " + str(report["exported"]) + " levels, " + str(report["failed"]) + " failed. Report written to " + report_path, file=sys.stderr)
+
+    return 1 if report["failed"] > 0 or len(files) == 0 else 0
+
+def RunBatchWorker(job_path):
+    with open(job_path) as job_file:
+        job = json.load(job_file)
+
+    # Make sure the add-on is registered, even if it isn't enabled in the user preferences.
+    if not hasattr(bpy.types.Scene, "shatter_export_path"):
+        import importlib
+        importlib.import_module(package_name).register()
+
+    from . import scene_panel
+    from . export_workers import WorkerOperator
+
+    results = []
+
+    scenes = [bpy.context.scene]
+    if "*" in job["scenes"]:
+        scenes = list(bpy.data.scenes)
+    elif len(job["scenes"]) > 0:
+        scenes = [bpy.data.scenes[name] for name in job["scenes"] if name in bpy.data.scenes]
+
+        for name in job["scenes"]:
+            if name not in bpy.data.scenes:
+                results.append({"scene" : name, "success" : False, "error" : "Scene not found.", "seconds" : 0.0})
+
+    operator = WorkerOperator()
+    for scene in scenes:
+        start = time.perf_counter()
+        result = {"scene" : scene.name, "success" : True, "error" : ""}
+        try:
+            # Settings that have to be overridden in the copy, such as paths that were relative to the original file.
+            for key, value in job.get("settings", {}).items():
+                setattr(scene, key, value)
+
+            with bpy.context.temp_override(scene=scene, view_layer=scene.view_layers[0]):
+                # The definitions are usually what changed, make sure they're current.
+                bpy.ops.shatter.load_definitions()
+
+                export_path = scene.shatter_export_path + scene.name + ".sls"
+                scene_panel.ExportLevel(operator, bpy.context, bpy.path.abspath(export_path))
+
+            if len(scene_panel.failed_assets) > 0:
+                result["success"] = False
+                result["error"] = "Failed to export " + ", ".join(scene_panel.failed_assets) + "."
+        except Exception as e:
+            result["success"] = False
+            result["error"] = str(e)
+
+        result["seconds"] = time.perf_counter() - start
+        results.append(result)
+
+    with open(job["result_path"], 'w') as result_file:
+        json.dump(results, result_file)
+
+    # The controller also sees the failure when the results can't be read.
+    if not all(result["success"] for result in results):
+        sys.exit(1)
+
+if __name__ == "__main__":
+    arguments = sys.argv[sys.argv.index("--") + 1:] if "--" in sys.argv else sys.argv[1:]
+    sys.exit(RunBatchExport(arguments))
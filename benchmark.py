@@ -0,0 +1,257 @@
+# Benchmarks the exporter and editor overlays on generated scenes and compares the results against stored baselines.
+#
+# Usage:
+#   blender -b --factory-startup --python benchmark.py -- [options]
+#
+# The run fails when a subsystem is slower than its baseline by more than the tolerance, or has no baseline at all.
+# Use --update-baseline to store the current timings as the new baseline, and commit benchmark_baseline.json with it.
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import tempfile
+import importlib
+
+import bpy
+
+package_dir = os.path.dirname(os.path.abspath(__file__))
+package_name = __package__ if __package__ else os.path.basename(package_dir)
+
+# Timing differences below this many seconds are considered noise.
+minimum_difference = 0.005
+
+def ImportAddon():
+    sys.path.insert(0, os.path.dirname(package_dir))
+    addon = importlib.import_module(package_name)
+    if not hasattr(bpy.types.Scene, "shatter_export_path"):
+        addon.register()
+
+    return addon
+
+def WriteDefinitions(path, type_count, property_count):
+    types = []
+    for index in range(type_count):
+        item = {
+            "name" : "bench_" + str(index),
+            "help" : "Generated benchmark type",
+            "target" : "entity,(1,0,0)",
+            "targets" : "entities,(0,1,0)",
+            "inputs" : ["Enable", "Disable"],
+            "outputs" : ["OnTrigger"]
+        }
+
+        for property_index in range(property_count):
+            item["value_" + str(property_index)] = "float"
+
+        types.append(item)
+
+    with open(path, 'w') as definition_file:
+        json.dump({"types" : types}, definition_file)
+
+def CreateMesh(name, vertices, edges = [], faces = []):
+    mesh = bpy.data.meshes.new(name)
+    mesh.from_pydata(vertices, edges, faces)
+    mesh.update()
+    return mesh
+
+def CreateScene(options, work_dir):
+    scene = bpy.context.scene
+    collection = scene.collection
+    generator = random.Random(0)
+
+    game_path = os.path.join(work_dir, "game") + os.sep
+    os.makedirs(game_path)
+    WriteDefinitions(os.path.join(game_path, "Definitions.fgd"), options.types, options.properties)
+
+    scene.shatter_export_path = os.path.join(game_path, "Levels") + os.sep
+    scene.shatter_export_meshes = False
+    scene.shatter_export_textures = False
+    scene.shatter_game_path = game_path
+
+    cube = [(-1, -1, -1), (1, -1, -1), (1, 1, -1), (-1, 1, -1), (-1, -1, 1), (1, -1, 1), (1, 1, 1), (-1, 1, 1)]
+    quads = [(0, 1, 2, 3), (4, 5, 6, 7), (0, 1, 5, 4), (1, 2, 6, 5), (2, 3, 7, 6), (3, 0, 4, 7)]
+
+    def RandomLocation():
+        return (generator.uniform(-options.extent, options.extent), generator.uniform(-options.extent, options.extent), generator.uniform(0, 50))
+
+    meshes = []
+    for index in range(options.meshes):
+        obj = bpy.data.objects.new("mesh_" + str(index), CreateMesh("mesh_" + str(index), cube, [], quads))
+        obj.location = RandomLocation()
+        collection.objects.link(obj)
+        meshes.append(obj)
+
+    for index in range(options.links):
+        obj = bpy.data.objects.new("entity_" + str(index), None)
+        obj.location = RandomLocation()
+        collection.objects.link(obj)
+        obj.shatter_type = "bench_" + str(index % options.types)
+
+        for prop in obj.shatter_properties:
+            if prop.type == "entity":
+                prop.value_o = generator.choice(meshes) if len(meshes) > 0 else None
+            elif prop.type == "entities" and len(meshes) > 0:
+                for target in generator.sample(meshes, min(3, len(meshes))):
+                    item = prop.value_c.add()
+                    item.name = "OnTrigger"
+                    item.value = target
+                    item.extra = "Enable"
+
+    prefab = bpy.data.collections.new("prefab")
+    for index in range(4):
+        obj = bpy.data.objects.new("prefab_" + str(index), CreateMesh("prefab_" + str(index), cube, [], quads))
+        obj.location = (index * 3, 0, 0)
+        prefab.objects.link(obj)
+
+    for index in range(options.instances):
+        obj = bpy.data.objects.new("instance_" + str(index), None)
+        obj.instance_type = "COLLECTION"
+        obj.instance_collection = prefab
+        obj.location = RandomLocation()
+        collection.objects.link(obj)
+
+    # A navigation-style chain of nodes.
+    node_vertices = [(index * 0.5, (index % 100) * 0.5, 0) for index in range(options.node_vertices)]
+    node_edges = [(index, index + 1) for index in range(options.node_vertices - 1)]
+    node = bpy.data.objects.new("nodes", CreateMesh("nodes", node_vertices, node_edges))
+    collection.objects.link(node)
+    node.shatter_type = "node"
+
+    bpy.context.view_layer.update()
+    return node
+
+def Measure(function, repeats):
+    timings = []
+    for index in range(repeats):
+        start = time.perf_counter()
+        function()
+        timings.append(time.perf_counter() - start)
+
+    return min(timings)
+
+def RunBenchmarks(options):
+    from . import scene_panel
+    from . import entity_schema
+    from . import link_overlay
+    from . link_grid import LinkGrid
+    from . export_workers import WorkerOperator
+
+    work_dir = tempfile.mkdtemp(prefix="shatter_benchmark_")
+    node = CreateScene(options, work_dir)
+
+    context = bpy.context
+    objects = list(context.scene.objects)
+    operator = WorkerOperator()
+
+    def LoadDefinitions():
+        # Force a cold parse and a full ApplyDefinitions pass.
+        entity_schema.parsed_definitions.clear()
+        scene_panel.loaded_definitions = None
+        bpy.ops.shatter.load_definitions()
+
+    def ExportObjects():
+        scene_panel.ExportObjects(operator, context)
+
+    def GetPropertyValues():
+        for obj in objects:
+            for prop in obj.shatter_properties:
+                scene_panel.GetPropertyValue(obj, prop)
+
+    def ParseNode():
+        scene_panel.ResetExporter()
+        scene_panel.ParseNode(context, node, {})
+
+    def GatherLinks():
+        for obj in objects:
+            link_overlay.GatherLinksForObject(obj, [], [], [])
+
+    def GatherLabels():
+        link_overlay.RebuildLabels(objects)
+
+    def BuildLinkGrid():
+        LinkGrid(link_overlay.grid_cell_size).Update(lambda: objects, link_overlay.GatherLinksForObject)
+
+    benchmarks = [
+        ("LoadDefinitions", LoadDefinitions),
+        ("ExportObjects", ExportObjects),
+        ("GetPropertyValue", GetPropertyValues),
+        ("ParseNode", ParseNode),
+        ("GatherLinks", GatherLinks),
+        ("GatherLabels", GatherLabels),
+        ("LinkGrid", BuildLinkGrid),
+    ]
+
+    return {name : Measure(function, options.repeats) for name, function in benchmarks}
+
+def GetConfigurationKey(options):
+    return "meshes={} links={} instances={} node_vertices={} types={} properties={}".format(
+        options.meshes, options.links, options.instances, options.node_vertices, options.types, options.properties)
+
+def CompareBaseline(timings, baseline, tolerance):
+    regressions = []
+    missing = []
+    for name, seconds in timings.items():
+        reference = baseline.get(name)
+        line = name.ljust(20) + format(seconds * 1000.0, "10.2f") + " ms"
+        if reference != None:
+            line += format(reference * 1000.0, "10.2f") + " ms baseline"
+            if seconds > reference * (1.0 + tolerance) and seconds - reference > minimum_difference:
+                regressions.append(name)
+                line += "  REGRESSION"
+        else:
+            missing.append(name)
+            line += "  NO BASELINE"
+        print(line)
+
+    return regressions, missing
+
+def Main(arguments):
+    parser = argparse.ArgumentParser(description="Benchmarks the Shatter exporter on generated scenes.")
+    parser.add_argument("--meshes", type=int, default=1000, help="Number of unique mesh objects")
+    parser.add_argument("--links", type=int, default=1000, help="Number of entities with link properties")
+    parser.add_argument("--instances", type=int, default=250, help="Number of collection instances")
+    parser.add_argument("--node-vertices", type=int, default=20000, help="Number of vertices in the node mesh")
+    parser.add_argument("--types", type=int, default=100, help="Number of entity types in the definitions file")
+    parser.add_argument("--properties", type=int, default=10, help="Number of additional properties per entity type")
+    parser.add_argument("--extent", type=float, default=500.0, help="Half size of the area the objects are spread over")
+    parser.add_argument("--repeats", type=int, default=3, help="Every subsystem is timed this many times, the fastest run counts")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Allowed slowdown relative to the baseline")
+    parser.add_argument("--baseline", default=os.path.join(package_dir, "benchmark_baseline.json"), help="File that stores the baseline timings")
+    parser.add_argument("--update-baseline", action="store_true", help="Store the timings of this run as the new baseline")
+    options = parser.parse_args(arguments)
+
+    ImportAddon()
+    timings = importlib.import_module(package_name + ".benchmark").RunBenchmarks(options)
+
+    baselines = {}
+    if os.path.isfile(options.baseline):
+        with open(options.baseline) as baseline_file:
+            baselines = json.load(baseline_file)
+
+    key = GetConfigurationKey(options)
+    print("Benchmark: " + key)
+    regressions, missing = CompareBaseline(timings, baselines.get(key, {}), options.tolerance)
+
+    if options.update_baseline:
+        baselines[key] = timings
+        with open(options.baseline, 'w') as baseline_file:
+            json.dump(baselines, baseline_file, indent=4, sort_keys=True)
+        print("Baseline stored in " + options.baseline)
+        return 0
+
+    # Storing a baseline on the first run would let a regressed build define its own reference, so a missing one fails.
+    if len(missing) > 0:
+        print("No baseline for " + ", ".join(missing) + " in " + options.baseline + ", run with --update-baseline to store one.")
+        return 1
+
+    if len(regressions) > 0:
+        print("Performance regressions: " + ", ".join(regressions))
+        return 1
+
+    return 0
+
+if __name__ == "__main__":
+    arguments = sys.argv[sys.argv.index("--") + 1:] if "--" in sys.argv else []
+    sys.exit(Main(arguments))
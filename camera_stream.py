@@ -0,0 +1,79 @@
+import bpy
+
+from . import live_link
+
+# Last pose that was sent, only poses that differ from it are sent again.
+last_pose = None
+
+# Seconds between connection attempts while the game isn't running.
+reconnect_interval = 1.0
+
+# The largest 3D view is the one that is being worked in.
+def GetActiveView():
+    active = None
+    active_size = 0
+    for window in bpy.context.window_manager.windows:
+        for area in window.screen.areas:
+            if area.type == "VIEW_3D" and area.width * area.height > active_size:
+                active = area.spaces[0].region_3d
+                active_size = area.width * area.height
+
+    return active
+
+def StreamCamera():
+    global last_pose
+
+    from . import scene_panel
+
+    scene = bpy.context.scene
+    if scene == None or scene.shatter_stream_camera == False:
+        last_pose = None
+        return None
+
+    if not live_link.connection.IsConnected():
+        last_pose = None
+        if not scene_panel.ConnectLiveLink(bpy.context):
+            return reconnect_interval
+
+    interval = 1.0 / scene.shatter_stream_rate
+
+    region_3d = GetActiveView()
+    if region_3d == None:
+        return interval
+
+    location, direction = scene_panel.GetViewPose(region_3d)
+    pose = live_link.EncodeCameraPose(location, direction)
+    if pose != last_pose and live_link.connection.Send(pose):
+        last_pose = pose
+
+    return interval
+
+def StartCameraStream():
+    if not bpy.app.timers.is_registered(StreamCamera):
+        bpy.app.timers.register(StreamCamera, first_interval=0.0)
+
+def StopCameraStream():
+    global last_pose
+
+    last_pose = None
+    if bpy.app.timers.is_registered(StreamCamera):
+        bpy.app.timers.unregister(StreamCamera)
+
+def OnStreamUpdate(self, context):
+    if context.scene.shatter_stream_camera:
+        StartCameraStream()
+    else:
+        StopCameraStream()
+
+@bpy.app.handlers.persistent
+def OnLoad(parameters):
+    # Timers don't survive loading a file, pick the stream up again if the file had it enabled.
+    if bpy.context.scene.shatter_stream_camera:
+        StartCameraStream()
+
+def RegisterCameraStream():
+    bpy.app.handlers.load_post.append(OnLoad)
+
+def UnregisterCameraStream():
+    StopCameraStream()
+    bpy.app.handlers.load_post.remove(OnLoad)
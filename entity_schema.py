@@ -0,0 +1,78 @@
+import os
+import json
+import hashlib
+
+# Compiled form of the entity definitions, so hot code paths don't have to scan the definition lists.
+class EntitySchema:
+    def __init__(self, definitions):
+        self.definitions = definitions
+
+        # Properties are identified by their key and type.
+        self.properties = {(definition["key"], definition["type"]) : definition for definition in definitions}
+        self.debug_colors = {identifier : definition["debug_color"] for identifier, definition in self.properties.items() if "debug_color" in definition}
+
+        self.no_transform = ("no_transform", "no_transform") in self.properties
+
+        # Everything that determines which properties an object of this type ends up with.
+        self.layout = frozenset((definition["key"], definition["type"], definition.get("subtype", "")) for definition in definitions)
+
+        self.inputs = [str(definition["key"]) for definition in definitions if definition["type"] == "input"]
+        self.outputs = [str(definition["key"]) for definition in definitions if definition["type"] == "output"]
+
+    def HasProperty(self, key, type):
+        return (key, type) in self.properties
+
+    def GetDebugColor(self, key, type, default = None):
+        return self.debug_colors.get((key, type), default)
+
+def CompileDefinitions(entity_meta):
+    return {name : EntitySchema(definitions) for name, definitions in entity_meta.items()}
+
+# Parsed definition files, keyed by their path.
+parsed_definitions = {}
+
+def HashFile(path):
+    with open(path, 'rb') as definition_file:
+        return hashlib.sha1(definition_file.read()).hexdigest()
+
+# Returns the content hash and the parsed contents of a definitions file, only parsing it again when it has changed.
+def LoadDefinitionsFile(path, force = False):
+    if force or not os.path.isfile(path):
+        parsed_definitions.pop(path, None)
+
+    if not os.path.isfile(path):
+        return "missing", None
+
+    stat = os.stat(path)
+    cached = parsed_definitions.get(path)
+    if cached != None and cached["size"] == stat.st_size and cached["mtime"] == stat.st_mtime_ns:
+        return cached["hash"], cached["definitions"]
+
+    # The file was touched, but its contents may still be the same.
+    signature = HashFile(path)
+    if cached != None and cached["hash"] == signature:
+        cached["size"] = stat.st_size
+        cached["mtime"] = stat.st_mtime_ns
+        return signature, cached["definitions"]
+
+    with open(path) as definition_file:
+        print("Loading definitions. (" + path + ")")
+        definitions = json.load(definition_file)
+
+    parsed_definitions[path] = {
+        "size" : stat.st_size,
+        "mtime" : stat.st_mtime_ns,
+        "hash" : signature,
+        "definitions" : definitions
+    }
+
+    return signature, definitions
+
+# Returns the names of all types whose properties differ between two compiled schemas.
+def GetChangedTypes(previous_schema, schema):
+    changed = set(previous_schema.keys()) ^ set(schema.keys())
+    for name in previous_schema.keys() & schema.keys():
+        if previous_schema[name].layout != schema[name].layout:
+            changed.add(name)
+
+    return changed
@@ -0,0 +1,134 @@
+import os
+import json
+import hashlib
+from array import array
+
+import bpy
+
+from . import json_cache
+
+cache_version = 2
+
+# Fingerprints recorded during the previous export, loaded from disk.
+previous_meshes = {}
+previous_entities = {}
+
+# Fingerprints gathered during the current export.
+current_meshes = {}
+current_entities = {}
+
+# Entities whose fingerprint differs from the previous export.
+changed_entities = []
+
+def GetCachePath(context):
+    return bpy.path.abspath(context.scene.shatter_export_path + context.scene.name + ".cache")
+
+def LoadExportCache(context):
+    previous_meshes.clear()
+    previous_entities.clear()
+    current_meshes.clear()
+    current_entities.clear()
+    changed_entities.clear()
+
+    cache = json_cache.LoadCache(GetCachePath(context), cache_version, "export cache")
+    if cache != None:
+        previous_meshes.update(cache.get("meshes", {}))
+        previous_entities.update(cache.get("entities", {}))
+
+def SaveExportCache(context):
+    # Entities that no longer exist are dropped, meshes are shared and may be exported again later.
+    json_cache.SaveCache(GetCachePath(context), cache_version, "export cache", {
+        "meshes" : json_cache.MergeEntries(previous_meshes, current_meshes),
+        "entities" : current_entities
+    })
+
+def HashAttribute(digest, collection, attribute, components, typecode='f'):
+    # Bulk copy the attribute so we don't have to touch every element from Python.
+    data = array(typecode, [0]) * (len(collection) * components)
+    collection.foreach_get(attribute, data)
+    digest.update(data.tobytes())
+
+def HashValue(digest, value):
+    digest.update(str(value).encode("utf-8"))
+    digest.update(b"\0")
+
+def HashFile(digest, path):
+    # Size and modification time are enough to tell whether a source file was touched.
+    try:
+        stat = os.stat(path)
+        HashValue(digest, path)
+        HashValue(digest, stat.st_size)
+        HashValue(digest, stat.st_mtime_ns)
+    except OSError:
+        HashValue(digest, "missing:" + path)
+
+# Object settings that are written into the entity of the object.
+entity_properties = (
+    "shatter_type", "shatter_type_custom", "shatter_shader_type", "shatter_shader_type_custom",
+    "shatter_collision", "shatter_collision_type", "shatter_collision_damping", "shatter_collision_friction",
+    "shatter_collision_restitution", "shatter_collision_drag", "shatter_collision_mobility",
+    "shatter_animation", "shatter_animation_playrate", "shatter_maximum_render_distance",
+    "shatter_visible", "shatter_export", "shatter_prefab", "shatter_uuid"
+)
+
+def GetEntityProperties(obj):
+    return [(key, getattr(obj, key)) for key in entity_properties]
+
+# Fingerprints what ends up in the mesh file, the mesh data, modifiers, materials and the scene's mesh export settings.
+# Entity settings are left out, objects that share a mesh get the same fingerprint.
+def GetMeshFingerprint(context, depsgraph, obj, texture = None):
+    digest = hashlib.sha1()
+
+    HashValue(digest, context.scene.shatter_mesh_format)
+    HashValue(digest, context.scene.unit_settings.scale_length)
+
+    # Evaluated geometry, this includes the result of the modifier stack.
+    evaluated = obj.evaluated_get(depsgraph)
+    mesh = evaluated.to_mesh()
+    try:
+        HashValue(digest, len(mesh.vertices))
+        HashAttribute(digest, mesh.vertices, "co", 3)
+        HashAttribute(digest, mesh.loops, "vertex_index", 1, 'i')
+        HashAttribute(digest, mesh.polygons, "loop_total", 1, 'i')
+        for layer in mesh.uv_layers:
+            HashValue(digest, layer.name)
+            HashAttribute(digest, layer.data, "uv", 2)
+    finally:
+        evaluated.to_mesh_clear()
+
+    # Modifier settings that might not be visible in the evaluated geometry. (e.g. disabled for render)
+    for modifier in obj.modifiers:
+        HashValue(digest, modifier.name)
+        HashValue(digest, modifier.type)
+        HashValue(digest, modifier.show_render)
+
+    for slot in obj.material_slots:
+        if slot.material is None:
+            HashValue(digest, "")
+            continue
+
+        HashValue(digest, slot.material.name)
+        HashValue(digest, slot.material.shatter_material)
+
+    if texture != None:
+        HashFile(digest, texture["path"])
+
+    return digest.hexdigest()
+
+def GetEntityFingerprint(entity):
+    return hashlib.sha1(json.dumps(entity, sort_keys=True).encode("utf-8")).hexdigest()
+
+def IsMeshUnchanged(asset_name, fingerprint, output_path):
+    return json_cache.IsUnchanged(previous_meshes, asset_name, fingerprint, output_path)
+
+def StoreMeshFingerprint(asset_name, fingerprint):
+    current_meshes[asset_name] = fingerprint
+
+def StoreEntityFingerprint(entity):
+    if "uuid" not in entity:
+        return
+
+    fingerprint = GetEntityFingerprint(entity)
+    current_entities[entity["uuid"]] = fingerprint
+    if previous_entities.get(entity["uuid"]) != fingerprint:
+        changed_entities.append(entity["uuid"])
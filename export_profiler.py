@@ -0,0 +1,134 @@
+import os
+import json
+import time
+import threading
+import tracemalloc
+from contextlib import contextmanager, nullcontext
+
+# Collects Chrome trace events (chrome://tracing, Perfetto) for every export phase while enabled.
+enabled = False
+track_memory = False # Tracing allocations slows down everything else, so memory is only tracked on request.
+events = []
+phase_totals = {} # Phase name -> [total seconds, count]
+object_totals = {} # Object name -> total seconds spent in ParseObject
+start_time = 0.0
+
+# Phases are also recorded from the texture copy threads.
+lock = threading.Lock()
+
+# Only stop tracing memory if the profiler was the one that started it.
+started_tracing = False
+
+def GetTimestamp():
+    return (time.perf_counter() - start_time) * 1000000.0
+
+def Begin(enable, memory = False):
+    global enabled, track_memory, start_time, started_tracing
+
+    enabled = enable
+    track_memory = enable and memory
+    events.clear()
+    phase_totals.clear()
+    object_totals.clear()
+    start_time = time.perf_counter()
+
+    started_tracing = track_memory and not tracemalloc.is_tracing()
+    if started_tracing:
+        tracemalloc.start()
+
+@contextmanager
+def RecordPhase(name, args):
+    start = GetTimestamp()
+    try:
+        yield
+    finally:
+        duration = GetTimestamp() - start
+        event = {
+            "name" : name,
+            "cat" : "export",
+            "ph" : "X",
+            "ts" : start,
+            "dur" : duration,
+            "pid" : os.getpid(),
+            "tid" : threading.get_ident()
+        }
+
+        if args != None:
+            event["args"] = args
+
+        with lock:
+            events.append(event)
+
+            total = phase_totals.setdefault(name, [0.0, 0])
+            total[0] += duration / 1000000.0
+            total[1] += 1
+
+            if name == "ParseObject" and args != None:
+                object_totals[args["object"]] = object_totals.get(args["object"], 0.0) + duration / 1000000.0
+
+def Phase(name, args = None):
+    if not enabled:
+        return nullcontext()
+
+    return RecordPhase(name, args)
+
+def RecordMemory():
+    if not track_memory:
+        return
+
+    current, peak = tracemalloc.get_traced_memory()
+    with lock:
+        events.append({
+            "name" : "Python memory",
+            "ph" : "C",
+            "ts" : GetTimestamp(),
+            "pid" : os.getpid(),
+            "args" : {"current" : current, "peak" : peak}
+        })
+
+def GetSummary():
+    if not enabled:
+        return ""
+
+    total = (time.perf_counter() - start_time)
+    summary = "Export took " + format(total, ".2f") + "s"
+
+    phases = sorted(phase_totals.items(), key=lambda item: item[1][0], reverse=True)
+    summary += " (" + ", ".join(name + " " + format(seconds, ".2f") + "s" for name, (seconds, count) in phases) + ")"
+
+    slowest = sorted(object_totals.items(), key=lambda item: item[1], reverse=True)[:5]
+    if len(slowest) > 0:
+        summary += ", slowest objects: " + ", ".join(name + " " + format(seconds, ".2f") + "s" for name, seconds in slowest)
+
+    if track_memory:
+        summary += ", peak Python memory " + format(tracemalloc.get_traced_memory()[1] / (1024 * 1024), ".1f") + " MB"
+
+    return summary
+
+def Finish(trace_path):
+    global enabled, track_memory, started_tracing
+
+    if not enabled:
+        return ""
+
+    RecordMemory()
+
+    with lock:
+        summary = GetSummary()
+
+        try:
+            with open(trace_path, 'w') as trace_file:
+                json.dump({"traceEvents" : events, "displayTimeUnit" : "ms"}, trace_file)
+            print("Export trace written to " + trace_path)
+        except Exception as e:
+            print("Failed to write export trace. (" + str(e) + ")")
+
+        enabled = False
+        track_memory = False
+        events.clear()
+
+    if started_tracing:
+        tracemalloc.stop()
+        started_tracing = False
+
+    return summary
@@ -0,0 +1,142 @@
+import os
+import json
+import time
+import shutil
+import tempfile
+import subprocess
+
+import bpy
+
+# Mesh jobs that were queued up during the current export.
+queued_jobs = []
+
+# Seconds the workers get to finish all of their meshes before they're killed and the meshes are exported locally.
+worker_timeout = 600.0
+
+def IsEnabled(context):
+    return context.scene.shatter_export_workers > 0
+
+def ResetJobs():
+    queued_jobs.clear()
+
+def QueueMeshJob(obj, armature, asset_name, export_path, fingerprint):
+    job = {
+        "object" : obj.name,
+        "armature" : armature.name if armature != None else "",
+        "asset" : asset_name,
+        "export_path" : export_path,
+        "fingerprint" : fingerprint
+    }
+    queued_jobs.append(job)
+
+def SplitJobs(jobs, count):
+    # Round-robin the jobs so every worker gets a similar amount of meshes.
+    chunks = [jobs[index::count] for index in range(count)]
+    return [chunk for chunk in chunks if len(chunk) > 0]
+
+def GetWorkerCommand(snapshot_path, job_path):
+    package_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    expression = (
+        "import sys; sys.path.insert(0, " + repr(package_dir) + "); "
+        "import importlib; "
+        "importlib.import_module(" + repr(__package__ + ".export_workers") + ").RunWorker(" + repr(job_path) + ")"
+    )
+
+    return [bpy.app.binary_path, "-b", snapshot_path, "--python-exit-code", "1", "--python-expr", expression]
+
+def RunJobs(operator, context):
+    if len(queued_jobs) == 0:
+        return []
+
+    worker_dir = tempfile.mkdtemp(prefix="shatter_export_")
+    snapshot_path = os.path.join(worker_dir, "snapshot.blend")
+
+    # The snapshot includes any unsaved changes, the workers only ever see this copy.
+    bpy.ops.wm.save_as_mainfile(filepath=snapshot_path, copy=True, check_existing=False)
+
+    chunks = SplitJobs(queued_jobs, context.scene.shatter_export_workers)
+    print("Exporting " + str(len(queued_jobs)) + " meshes using " + str(len(chunks)) + " workers.")
+
+    workers = []
+    for index, chunk in enumerate(chunks):
+        job_path = os.path.join(worker_dir, "job" + str(index) + ".json")
+        result_path = os.path.join(worker_dir, "result" + str(index) + ".json")
+        with open(job_path, 'w') as job_file:
+            json.dump({"scene" : context.scene.name, "view_layer" : context.view_layer.name, "meshes" : chunk, "result_path" : result_path}, job_file)
+
+        process = subprocess.Popen(GetWorkerCommand(snapshot_path, job_path))
+        workers.append((process, chunk, result_path))
+
+    exported = []
+    failed = []
+    deadline = time.perf_counter() + worker_timeout
+    for process, chunk, result_path in workers:
+        try:
+            process.wait(timeout=max(0.0, deadline - time.perf_counter()))
+        except subprocess.TimeoutExpired:
+            print("Worker timed out after " + str(worker_timeout) + " seconds.")
+            process.kill()
+            process.wait()
+
+        if process.returncode != 0:
+            print("Worker exited with code " + str(process.returncode) + ".")
+
+        results = {}
+        try:
+            with open(result_path) as result_file:
+                results = json.load(result_file)
+        except Exception as e:
+            print("Failed to read worker results. (" + str(e) + ")")
+
+        for job in chunk:
+            if results.get(job["asset"]) == True:
+                exported.append(job)
+            else:
+                failed.append(job)
+
+    shutil.rmtree(worker_dir, ignore_errors=True)
+    queued_jobs.clear()
+
+    # Anything the workers couldn't handle is exported locally instead.
+    if len(failed) > 0:
+        print(str(len(failed)) + " meshes failed to export in the background, retrying locally.")
+
+    from . import scene_panel
+    for job in failed:
+        obj = bpy.data.objects.get(job["object"])
+        armature = bpy.data.objects.get(job["armature"]) if len(job["armature"]) > 0 else None
+        if obj != None and scene_panel.ExportMesh(operator, context, obj, job["export_path"], armature):
+            exported.append(job)
+
+    return exported
+
+class WorkerOperator:
+    def report(self, type, message):
+        print(str(type) + " " + message)
+
+def RunWorker(job_path):
+    with open(job_path) as job_file:
+        job = json.load(job_file)
+
+    from . import scene_panel
+
+    # Batch exports don't necessarily export the scene that was active when the snapshot was saved.
+    scene = bpy.data.scenes[job["scene"]]
+    view_layer = scene.view_layers[job["view_layer"]]
+
+    results = {}
+    operator = WorkerOperator()
+    with bpy.context.temp_override(scene=scene, view_layer=view_layer):
+        context = bpy.context
+        for mesh in job["meshes"]:
+            obj = bpy.data.objects.get(mesh["object"])
+            if obj == None:
+                print("Worker could not find object " + mesh["object"] + ".")
+                results[mesh["asset"]] = False
+                continue
+
+            armature = bpy.data.objects.get(mesh["armature"]) if len(mesh["armature"]) > 0 else None
+            results[mesh["asset"]] = scene_panel.ExportMesh(operator, context, obj, mesh["export_path"], armature)
+
+    with open(job["result_path"], 'w') as result_file:
+        json.dump(results, result_file)
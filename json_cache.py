@@ -0,0 +1,51 @@
+import os
+import json
+
+# Shared storage for the caches that let exports skip work whose output is still up to date.
+# Every cache is a JSON file with a version, a cache with a different version is ignored as a whole.
+
+# Returns the contents of the cache file, or None if there is no usable cache.
+def LoadCache(path, version, description):
+    if not os.path.isfile(path):
+        return None
+
+    try:
+        with open(path) as cache_file:
+            cache = json.load(cache_file)
+    except Exception as e:
+        print("Failed to load " + description + ". (" + str(e) + ")")
+        return None
+
+    if cache.get("version") != version:
+        print("The " + description + " is outdated and was ignored.")
+        return None
+
+    return cache
+
+# Writes the cache to a temporary file first, so an interrupted save never leaves a truncated cache behind.
+def SaveCache(path, version, description, contents):
+    cache = {"version" : version}
+    cache.update(contents)
+
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+
+        temporary_path = path + ".tmp"
+        with open(temporary_path, 'w') as cache_file:
+            json.dump(cache, cache_file)
+        os.replace(temporary_path, path)
+    except Exception as e:
+        print("Failed to save " + description + ". (" + str(e) + ")")
+
+# Entries that weren't visited during this export, for example because they belong to another scene, stay valid.
+def MergeEntries(previous, current):
+    entries = dict(previous)
+    entries.update(current)
+    return entries
+
+# An entry only counts if the file it describes still exists.
+def IsUnchanged(previous, key, fingerprint, output_path):
+    if previous.get(key) != fingerprint:
+        return False
+
+    return os.path.isfile(output_path)
@@ -0,0 +1,223 @@
+import os
+import uuid
+from math import floor
+
+from mathutils import Matrix, Vector
+
+from . level_writer import LevelWriter
+
+# Asset references that entities store under these keys, the assets are moved into the cell that uses them.
+asset_keys = {
+    "mesh" : "mesh",
+    "texture" : "texture",
+    "shader" : "shader"
+}
+
+def GetWorldBounds(obj):
+    corners = [obj.matrix_world @ Vector(corner) for corner in obj.bound_box]
+
+    # Instances have no bounds of their own, they cover whatever they instance.
+    if obj.type == "EMPTY" and obj.instance_type == "COLLECTION" and obj.instance_collection != None:
+        matrix = obj.matrix_world @ Matrix.Translation(-obj.instance_collection.instance_offset)
+        for child in obj.instance_collection.all_objects:
+            child_matrix = matrix @ child.matrix_world
+            corners.extend(child_matrix @ Vector(corner) for corner in child.bound_box)
+
+    minimum = Vector(tuple(min(corner[axis] for corner in corners) for axis in range(3)))
+    maximum = Vector(tuple(max(corner[axis] for corner in corners) for axis in range(3)))
+    return minimum, maximum
+
+def BoundsToString(minimum, maximum):
+    return " ".join(format(value, 'f') for value in minimum) + "," + " ".join(format(value, 'f') for value in maximum)
+
+# Names of the objects that link to other objects by name or are linked to, both sides of a link have to be loaded together.
+def GetLinkedNames(objects):
+    linked = set()
+    for obj in objects:
+        for prop in obj.shatter_properties:
+            targets = []
+            if prop.type == "entities":
+                targets = [entity.value for entity in prop.value_c if entity.value != None]
+            elif prop.type == "entity" and prop.value_o != None:
+                targets = [prop.value_o]
+
+            if len(targets) > 0:
+                linked.add(obj.name)
+                linked.update(target.name for target in targets)
+
+    return linked
+
+# Cells keep their level file open while entities are streamed into it, this limits how many are open at once.
+maximum_open_cells = 64
+
+class Cell:
+    def __init__(self, key, writer):
+        self.key = key
+        self.writer = writer
+        self.used = {} # (asset type, asset name) of the assets the entities in this cell use, in order of use.
+        self.minimum = None
+        self.maximum = None
+
+    def Extend(self, minimum, maximum):
+        if self.minimum == None:
+            self.minimum = minimum.copy()
+            self.maximum = maximum.copy()
+            return
+
+        for axis in range(3):
+            self.minimum[axis] = min(self.minimum[axis], minimum[axis])
+            self.maximum[axis] = max(self.maximum[axis], maximum[axis])
+
+# Stands in for the level writer and sorts entities into a uniform grid of cells on the ground plane.
+# Every cell becomes its own sub-level that entities are streamed into, the root level references the cells and keeps everything that can't be streamed.
+class CellWriter:
+    def __init__(self, writer, level_path, cell_directory, cell_size, linked_names):
+        self.writer = writer
+        self.level_path = level_path
+        self.cell_directory = cell_directory # Relative to the game directory.
+        self.cell_size = cell_size
+        self.linked_names = linked_names
+        self.cells = {}
+        self.open_cells = [] # Cells with an open level file, least recently used first.
+        self.root_references = set() # (asset type, asset name) of every asset the root level uses.
+
+        self.directory = os.path.join(os.path.dirname(level_path), os.path.basename(cell_directory.rstrip("/")))
+
+        self.cell = None
+        self.bounds = None
+
+    def Begin(self, header):
+        self.writer.Begin(header)
+
+    def IsLinked(self, obj):
+        if obj.name in self.linked_names:
+            return True
+
+        if obj.type == "EMPTY" and obj.instance_type == "COLLECTION" and obj.instance_collection != None:
+            return any(child.name in self.linked_names for child in obj.instance_collection.all_objects)
+
+        return False
+
+    # Picks the cell for the entities of the object that is about to be parsed.
+    def SetObject(self, obj):
+        self.cell = None
+
+        # Hierarchies and linked entities reference each other by name, so they stay together in the root level.
+        if obj.parent != None or len(obj.children) > 0 or self.IsLinked(obj):
+            return
+
+        minimum, maximum = GetWorldBounds(obj)
+        size = maximum - minimum
+        if size.x > self.cell_size or size.y > self.cell_size:
+            return
+
+        center = (minimum + maximum) * 0.5
+        key = (floor(center.x / self.cell_size), floor(center.y / self.cell_size))
+
+        self.cell = self.cells.get(key)
+        if self.cell == None:
+            self.cell = self.CreateCell(key)
+            self.cells[key] = self.cell
+
+        self.bounds = (minimum, maximum)
+
+    def GetCellName(self, key):
+        return "cell_" + str(key[0]) + "_" + str(key[1])
+
+    def GetCellPath(self, key):
+        return self.cell_directory + self.GetCellName(key)
+
+    def CreateCell(self, key):
+        os.makedirs(self.directory, exist_ok=True)
+
+        path = self.GetCellPath(key)
+        writer = LevelWriter(os.path.join(self.directory, self.GetCellName(key) + ".sls"))
+        writer.Begin({"version" : "0", "uuid" : str( uuid.uuid5(uuid.NAMESPACE_URL, path) ), "save" : "0"})
+        return Cell(key, writer)
+
+    # Keeps the cell's level file open and closes the one that was used the longest time ago if too many are open.
+    def TouchCell(self, cell):
+        if cell in self.open_cells:
+            self.open_cells.remove(cell)
+        self.open_cells.append(cell)
+
+        if len(self.open_cells) > maximum_open_cells:
+            self.open_cells.pop(0).writer.Suspend()
+
+    def append(self, entity):
+        if self.cell == None or "position" not in entity or "parent" in entity:
+            for entity_key, asset_type in asset_keys.items():
+                self.root_references.add((asset_type, entity.get(entity_key)))
+
+            self.writer.append(entity)
+            return
+
+        for entity_key, asset_type in asset_keys.items():
+            reference = (asset_type, entity.get(entity_key))
+            if reference[1] != None:
+                self.cell.used[reference] = None
+
+        self.TouchCell(self.cell)
+        self.cell.writer.append(entity)
+        self.cell.Extend(*self.bounds)
+
+    def __len__(self):
+        return len(self.writer) + sum(len(cell.writer) for cell in self.cells.values())
+
+    # Finishes the cell levels, then the root level with a reference to every cell.
+    def Finish(self, assets):
+        assets_by_name = {}
+        for asset in assets:
+            assets_by_name[(asset["type"], asset["name"])] = asset
+
+        used_by_cells = set()
+
+        written = set()
+        for key, cell in sorted(self.cells.items()):
+            # Objects that were sorted into a cell don't always end up adding entities to it.
+            if len(cell.writer) == 0:
+                cell.writer.Abort()
+                continue
+
+            name = self.GetCellName(key)
+            path = self.GetCellPath(key)
+
+            cell_assets = [assets_by_name[reference] for reference in cell.used if reference in assets_by_name]
+            used_by_cells.update(cell.used)
+
+            cell.writer.Finish(cell_assets)
+            written.add(name + ".sls")
+
+            reference = {}
+            reference["type"] = "level"
+            reference["path"] = path + ".sls"
+            reference["uuid"] = str( uuid.uuid5(uuid.NAMESPACE_URL, path) )
+            reference["position"] = "0 0 0"
+            reference["rotation"] = "0 0 0"
+            reference["scale"] = "1 1 1"
+            reference["bounds"] = BoundsToString(cell.minimum, cell.maximum)
+            self.writer.append(reference)
+
+        self.open_cells.clear()
+
+        # Assets that only cells use are loaded along with those cells, everything else stays in the root.
+        root_assets = []
+        for asset in assets:
+            reference = (asset["type"], asset["name"])
+            if reference not in used_by_cells or reference in self.root_references:
+                root_assets.append(asset)
+        self.writer.Finish(root_assets)
+
+        # Cells that no longer have any entities are only removed once the new root level no longer references them.
+        if os.path.isdir(self.directory):
+            for file_name in os.listdir(self.directory):
+                if file_name.endswith(".sls") and file_name not in written:
+                    os.remove(os.path.join(self.directory, file_name))
+
+        print("Partitioned the level into " + str(len(written)) + " cells.")
+
+    # Removes the partially written cell levels, the previously exported cells are left as they were.
+    def Abort(self):
+        for cell in self.cells.values():
+            cell.writer.Abort()
+        self.open_cells.clear()
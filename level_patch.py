@@ -0,0 +1,131 @@
+import os
+import json
+import hashlib
+
+# Bump this whenever the index layout changes so stale indices are ignored.
+index_version = 3
+
+# Path of the most recent patch, None when the last export didn't write one.
+last_patch_path = None
+
+def GetIndexPath(level_path):
+    return os.path.splitext(level_path)[0] + ".index"
+
+def GetPatchPath(level_path):
+    return os.path.splitext(level_path)[0] + ".patch.json"
+
+def HashEntity(entity):
+    return hashlib.sha1(json.dumps(entity, sort_keys=True).encode("utf-8")).hexdigest()
+
+def GetAssetKey(asset):
+    return asset["type"] + ":" + asset["name"]
+
+def LoadIndex(level_path):
+    index_path = GetIndexPath(level_path)
+    if not os.path.isfile(index_path) or not os.path.isfile(level_path):
+        return None
+
+    # The level was exported without writing an index afterwards, so the index no longer describes it.
+    if os.path.getmtime(index_path) < os.path.getmtime(level_path):
+        return None
+
+    try:
+        with open(index_path) as index_file:
+            index = json.load(index_file)
+
+        if index.get("version") == index_version:
+            return index
+    except Exception as e:
+        print("Failed to load level index. (" + str(e) + ")")
+
+    return None
+
+def WriteJson(path, data):
+    temporary_path = path + ".tmp"
+    with open(temporary_path, 'w') as output_file:
+        json.dump(data, output_file)
+    os.replace(temporary_path, path)
+
+# Stands in for the level writer and records which entities differ from the previously exported level.
+# Entities are keyed by their uuid, only the ones that were added or changed are kept in memory.
+class LevelPatch:
+    def __init__(self, level_path, writer):
+        self.level_path = level_path
+        self.writer = writer
+        self.previous = LoadIndex(level_path)
+        self.revision = self.previous["revision"] + 1 if self.previous != None else 1
+        self.level = ""
+
+        self.entities = {} # Entity key -> hash
+        self.added = []
+        self.changed = []
+
+    def Begin(self, header):
+        header["revision"] = str(self.revision)
+        self.level = header.get("uuid", "")
+        self.writer.Begin(header)
+
+    # Members of instanced collections get a uuid per instance, so every entity has a key of its own.
+    def GetKey(self, entity):
+        return entity.get("uuid", entity.get("name", ""))
+
+    def append(self, entity):
+        key = self.GetKey(entity)
+        digest = HashEntity(entity)
+        self.entities[key] = digest
+
+        if self.previous != None:
+            previous = self.previous["entities"].get(key)
+            if previous == None:
+                self.added.append(entity)
+            elif previous != digest:
+                self.changed.append(entity)
+
+        self.writer.append(entity)
+
+    def __len__(self):
+        return len(self.writer)
+
+    # Writes the index of this export and, if there was a previous export, the patch that turns it into this one.
+    # Returns the path of the patch or None if no patch was written.
+    def Finish(self, assets, changed_assets):
+        global last_patch_path
+
+        current_assets = {GetAssetKey(asset) : asset for asset in assets}
+        index = {
+            "version" : index_version,
+            "revision" : self.revision,
+            "entities" : self.entities,
+            "assets" : current_assets
+        }
+
+        patch_path = None
+        if self.previous != None:
+            previous_assets = self.previous["assets"]
+            added_assets = [asset for key, asset in current_assets.items() if previous_assets.get(key) != asset]
+            added_keys = set(GetAssetKey(asset) for asset in added_assets)
+
+            patch = {
+                "level" : self.level,
+                "base" : str(self.previous["revision"]),
+                "revision" : str(self.revision),
+                "entities" : {
+                    "added" : self.added,
+                    "changed" : self.changed,
+                    "removed" : [key for key in self.previous["entities"] if key not in self.entities]
+                },
+                "assets" : {
+                    "added" : added_assets,
+                    "removed" : [asset for key, asset in previous_assets.items() if key not in current_assets],
+                    "reload" : [asset for asset in changed_assets if GetAssetKey(asset) not in added_keys]
+                }
+            }
+
+            patch_path = GetPatchPath(self.level_path)
+            WriteJson(patch_path, patch)
+            print("Level patch: " + str(len(self.added)) + " added, " + str(len(self.changed)) + " changed, " + str(len(patch["entities"]["removed"])) + " removed entities.")
+
+        WriteJson(GetIndexPath(self.level_path), index)
+
+        last_patch_path = patch_path
+        return patch_path
@@ -0,0 +1,70 @@
+import os
+import json
+
+indentation = " " * 4
+
+# Writes a level script while it is being generated, so entities don't have to be kept around.
+# The level is written to a temporary file first and only replaces the actual level once it is complete.
+class LevelWriter:
+    def __init__(self, path):
+        self.path = path
+        self.temporary_path = path + ".tmp"
+        self.file = None
+        self.count = 0
+
+    def Begin(self, header):
+        self.file = open(self.temporary_path, 'w')
+        self.file.write("{\n")
+
+        # Everything except the asset and entity lists is known up front.
+        for key, value in header.items():
+            if key == "assets" or key == "entities":
+                continue
+
+            self.file.write(indentation + json.dumps(key) + ": " + json.dumps(value) + ",\n")
+
+        self.file.write(indentation + "\"entities\": [")
+
+    # Closes the file until the next entity is written, for when many levels are written at the same time.
+    def Suspend(self):
+        if self.file != None:
+            self.file.close()
+            self.file = None
+
+    def GetFile(self):
+        if self.file == None:
+            self.file = open(self.temporary_path, 'a')
+
+        return self.file
+
+    # Mimics list.append so the writer can stand in for the entity list.
+    def append(self, entity):
+        file = self.GetFile()
+        if self.count > 0:
+            file.write(",")
+
+        text = json.dumps(entity, indent=4)
+        file.write("\n" + "\n".join(indentation * 2 + line for line in text.splitlines()))
+        self.count += 1
+
+    def __len__(self):
+        return self.count
+
+    def Finish(self, assets):
+        # Assets are deduplicated during the export and are comparatively small, so they're written last.
+        self.GetFile()
+        self.file.write("\n" + indentation + "],\n")
+        text = json.dumps(assets, indent=4)
+        self.file.write(indentation + "\"assets\": " + text.replace("\n", "\n" + indentation) + "\n}\n")
+        self.file.close()
+        self.file = None
+
+        os.replace(self.temporary_path, self.path)
+
+    def Abort(self):
+        if self.file != None:
+            self.file.close()
+            self.file = None
+
+        if os.path.isfile(self.temporary_path):
+            os.remove(self.temporary_path)
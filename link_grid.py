@@ -0,0 +1,179 @@
+import itertools
+from math import floor
+
+import bpy
+from gpu_extras.batch import batch_for_shader
+
+import numpy as np
+
+# Segments that would cover more cells than this are kept in a bucket that is always drawn.
+maximum_cells_per_segment = 64
+oversized_cell = None
+
+corner_offsets = np.array(list(itertools.product((0.0, 1.0), repeat=3)))
+
+# Uniform grid over the link segments of all visible objects.
+# Each cell keeps its own batch, so only the cells that intersect the view frustum are drawn.
+class LinkGrid:
+    def __init__(self, cell_size):
+        self.cell_size = cell_size
+        self.Reset()
+
+    def Reset(self):
+        self.cells = {} # Cell key -> names of the objects with segments in that cell.
+        self.batches = {} # Cell key -> cached batch.
+        self.object_cells = {} # Object name -> cell key -> (positions, colors)
+        self.sources = {} # Target name -> names of the objects that link to it.
+        self.object_targets = {} # Object name -> names of the objects it links to.
+
+        self.visible = None
+        self.check_visibility = False
+        self.pending = set()
+
+        self.cell_keys = None
+        self.cell_corners = None
+
+    def MarkObject(self, name):
+        self.pending.add(name)
+
+        # A renamed object shows up under a name the grid doesn't know, the visibility check drops its old name.
+        if self.visible != None and name not in self.visible:
+            self.check_visibility = True
+
+    def MarkVisibility(self):
+        self.check_visibility = True
+
+    def GetCells(self, start, end):
+        low = [floor(min(start[axis], end[axis]) / self.cell_size) for axis in range(3)]
+        high = [floor(max(start[axis], end[axis]) / self.cell_size) for axis in range(3)]
+
+        count = (high[0] - low[0] + 1) * (high[1] - low[1] + 1) * (high[2] - low[2] + 1)
+        if count > maximum_cells_per_segment:
+            return [oversized_cell]
+
+        return itertools.product(*[range(low[axis], high[axis] + 1) for axis in range(3)])
+
+    def InvalidateCell(self, key):
+        self.batches.pop(key, None)
+
+        if len(self.cells[key]) == 0:
+            del self.cells[key]
+            self.cell_keys = None
+
+    def InsertObject(self, obj, gather):
+        name = obj.name
+
+        positions = []
+        colors = []
+        targets = []
+        gather(obj, positions, colors, targets)
+
+        self.object_targets[name] = set(targets)
+        for target in targets:
+            self.sources.setdefault(target, set()).add(name)
+
+        object_cells = {}
+        for index in range(0, len(positions), 2):
+            for key in self.GetCells(positions[index], positions[index + 1]):
+                cell_positions, cell_colors = object_cells.setdefault(key, ([], []))
+                cell_positions.extend(positions[index:index + 2])
+                cell_colors.extend(colors[index:index + 2])
+
+        self.object_cells[name] = object_cells
+        for key in object_cells:
+            if key not in self.cells:
+                self.cells[key] = set()
+                self.cell_keys = None
+
+            self.cells[key].add(name)
+            self.batches.pop(key, None)
+
+    def RemoveObject(self, name):
+        for target in self.object_targets.pop(name, ()):
+            if target in self.sources:
+                self.sources[target].discard(name)
+
+        for key in self.object_cells.pop(name, {}):
+            self.cells[key].discard(name)
+            self.InvalidateCell(key)
+
+    def Update(self, get_objects, gather):
+        # Only look at the full list of visible objects when visibility may have changed.
+        if self.visible == None or self.check_visibility:
+            objects = {obj.name : obj for obj in get_objects()}
+            names = set(objects.keys())
+            previous = self.visible if self.visible != None else set()
+
+            # Objects that link to a removed or renamed object still refer to it by its old name.
+            for name in previous - names:
+                self.RemoveObject(name)
+                self.pending.update(self.sources.pop(name, ()))
+
+            for name in names - previous:
+                self.InsertObject(objects[name], gather)
+
+            self.visible = names
+            self.check_visibility = False
+
+        if len(self.pending) == 0:
+            return
+
+        # Objects that link to a changed object have to be updated as well.
+        affected = set()
+        for name in self.pending:
+            affected.add(name)
+            affected.update(self.sources.get(name, ()))
+        self.pending.clear()
+
+        for name in affected:
+            self.RemoveObject(name)
+            self.visible.discard(name)
+
+            obj = bpy.data.objects.get(name)
+            if obj != None and obj.visible_get():
+                self.InsertObject(obj, gather)
+                self.visible.add(name)
+
+    def GetVisibleCells(self, perspective_matrix):
+        if self.cell_keys == None:
+            self.cell_keys = [key for key in self.cells if key != oversized_cell]
+            corners = (np.array(self.cell_keys, dtype=np.float64).reshape(-1, 1, 3) + corner_offsets) * self.cell_size
+            self.cell_corners = np.concatenate((corners, np.ones(corners.shape[0:2] + (1,))), axis=2)
+
+        visible = []
+        if oversized_cell in self.cells:
+            visible.append(oversized_cell)
+
+        if len(self.cell_keys) == 0:
+            return visible
+
+        # A cell is outside of the frustum when all of its corners are on the outer side of the same clip plane.
+        clip = self.cell_corners @ np.array(perspective_matrix).T
+        w = clip[:, :, 3]
+        outside = np.zeros(len(self.cell_keys), dtype=bool)
+        for axis in range(3):
+            outside |= np.all(clip[:, :, axis] < -w, axis=1)
+            outside |= np.all(clip[:, :, axis] > w, axis=1)
+
+        visible.extend(self.cell_keys[index] for index in np.flatnonzero(~outside))
+        return visible
+
+    def GetBatch(self, key, shader):
+        batch = self.batches.get(key)
+        if batch != None:
+            return batch
+
+        positions = []
+        colors = []
+        for name in self.cells[key]:
+            cell_positions, cell_colors = self.object_cells[name][key]
+            positions.extend(cell_positions)
+            colors.extend(cell_colors)
+
+        batch = batch_for_shader(shader, 'LINES', {"pos" : positions, "color" : colors})
+        self.batches[key] = batch
+        return batch
+
+    def Draw(self, perspective_matrix, shader):
+        for key in self.GetVisibleCells(perspective_matrix):
+            self.GetBatch(key, shader).draw(shader)
@@ -0,0 +1,267 @@
+import bpy
+import blf
+import gpu
+from gpu_extras.batch import batch_for_shader
+
+import numpy as np
+
+from . link_grid import LinkGrid
+
+entity_link_color = (0.0, 0.6, 0.3, 1.0)
+vector_link_color = (0.1, 0.0, 0.5, 1.0)
+label_color = (0.7, 0.7, 0.7, 1.0)
+
+# The links of selected objects are kept in a single batch that is only rebuilt when the scene changes.
+cached_batch = None
+dirty = True
+
+# When all links are shown, they're kept in a grid so only the links in view are drawn.
+grid_cell_size = 32.0
+link_grid = LinkGrid(grid_cell_size)
+
+# Labels are formatted once and only projected when they're drawn.
+cached_labels = []
+cached_label_locations = None
+labels_dirty = True
+
+shader = None
+
+def MarkDirty():
+    global dirty, labels_dirty
+    dirty = True
+    labels_dirty = True
+    link_grid.Reset()
+
+def GetLinkColor(schema, prop, color):
+    if schema == None or not schema.HasProperty(prop.name, prop.type):
+        return None
+
+    return schema.GetDebugColor(prop.name, prop.type, color)
+
+def GatherLinksForObject(obj, positions, colors, target_names = None):
+    schema = bpy.context.scene.shatter_schema.get(obj.shatter_type)
+    if schema == None:
+        return
+
+    start = obj.location[:]
+    for prop in obj.shatter_properties:
+        targets = []
+        color = entity_link_color
+        if prop.type == "entities":
+            targets = [entity.value for entity in prop.value_c if entity.value != None]
+        elif prop.type == "entity":
+            if prop.value_o != None:
+                targets = [prop.value_o]
+        elif prop.type == "vector":
+            targets = [prop.value_v[:]]
+            color = vector_link_color
+        else:
+            continue
+
+        color = GetLinkColor(schema, prop, color)
+        if color == None:
+            continue
+
+        if prop.type != "vector":
+            if target_names != None:
+                target_names.extend(target.name for target in targets)
+            targets = [target.location[:] for target in targets]
+
+        for end in targets:
+            positions.append(start)
+            positions.append(end)
+            colors.append(color)
+            colors.append(color)
+
+def GetVisibleObjects():
+    return bpy.context.visible_objects
+
+def RebuildBatch(objects):
+    global cached_batch
+
+    positions = []
+    colors = []
+    for obj in objects:
+        GatherLinksForObject(obj, positions, colors)
+
+    if len(positions) == 0:
+        cached_batch = None
+        return
+
+    cached_batch = batch_for_shader(shader, 'LINES', {"pos" : positions, "color" : colors})
+
+# This function goes through all objects that have link properties and draws the links.
+def DrawEntityLinks():
+    global dirty, shader
+
+    if shader == None:
+        shader = gpu.shader.from_builtin('FLAT_COLOR')
+
+    if bpy.context.scene.shatter_links_drawall == True:
+        link_grid.Update(GetVisibleObjects, GatherLinksForObject)
+        shader.bind()
+        link_grid.Draw(bpy.context.space_data.region_3d.perspective_matrix, shader)
+        return
+
+    if dirty:
+        RebuildBatch(bpy.context.selected_objects)
+        dirty = False
+
+    if cached_batch == None:
+        return
+
+    shader.bind()
+    cached_batch.draw(shader)
+
+def AddLabel(labels, location, text, color, offset):
+    labels.append((location[:], text, color, tuple(offset)))
+
+def GatherLabelsForObject(obj, labels):
+    color = label_color
+    schema = bpy.context.scene.shatter_schema.get(obj.shatter_type)
+
+    draw_label = True
+    offset = [0,0]
+    for prop in obj.shatter_properties:
+        if prop.type == "entities":
+            for entity in prop.value_c:
+                if hasattr(entity.value, "location") == False:
+                    continue
+
+                if draw_label:
+                    AddLabel(labels, entity.value.location, prop.name, color, offset)
+                    draw_label = False
+                    offset[0] += 10
+                    offset[1] -= 20
+
+                if schema == None:
+                    continue
+
+                if schema.HasProperty(prop.name, prop.type):
+                    debug_color = schema.GetDebugColor(prop.name, prop.type)
+                    if debug_color != None:
+                        text = entity.name + " execute " + entity.extra + "()"
+                        if len(entity.extra) == 0:
+                            text = entity.value.name
+
+                        AddLabel(labels, entity.value.location, text, debug_color, offset)
+                    else:
+                        AddLabel(labels, entity.value.location, entity.name + " execute " + entity.extra + "()", color, offset)
+                    offset[1] -= 20
+                draw_label = True
+                offset = [0,0]
+        elif prop.type == "entity":
+            entity = prop.value_o
+
+            if hasattr(entity, "location") == False:
+                continue
+
+            if draw_label:
+                AddLabel(labels, entity.location, prop.name, color, offset)
+                draw_label = False
+                offset[0] += 10
+                offset[1] -= 20
+
+            if schema == None:
+                continue
+
+            if schema.HasProperty(prop.name, prop.type):
+                AddLabel(labels, entity.location, entity.name, schema.GetDebugColor(prop.name, prop.type, color), offset)
+                offset[1] -= 20
+            draw_label = True
+            offset = [0,0]
+
+def RebuildLabels(objects):
+    global cached_label_locations
+
+    cached_labels.clear()
+    for obj in objects:
+        GatherLabelsForObject(obj, cached_labels)
+
+    # Homogeneous coordinates so every label can be projected with one matrix multiply.
+    cached_label_locations = np.ones((len(cached_labels), 4))
+    for index, label in enumerate(cached_labels):
+        cached_label_locations[index, 0:3] = label[0]
+
+def DrawText2D(color, position, text):
+    font_id = 0
+    blf.position(font_id, position[0], position[1], 0)
+    blf.color(font_id, 0.0, 0.0, 0.0, 0.75)
+    blf.draw(font_id, text)
+
+    blf.position(font_id, position[0] - 1.0 , position[1] + 1.0, 0)
+    blf.color(font_id, color[0], color[1], color[2], color[3])
+    blf.draw(font_id, text)
+
+def DrawEntityTexts():
+    global labels_dirty
+
+    if labels_dirty:
+        RebuildLabels(bpy.context.selected_objects)
+        labels_dirty = False
+
+    maximum = bpy.context.scene.shatter_labels_maximum
+    if len(cached_labels) == 0 or maximum == 0:
+        return
+
+    region = bpy.context.region
+    region_3d = bpy.context.space_data.region_3d
+
+    # Cull everything outside of the view before doing any per-label work.
+    clip = cached_label_locations @ np.array(region_3d.perspective_matrix).T
+    depth = clip[:, 3]
+    visible = (depth > 1e-5) & (np.abs(clip[:, 0]) <= depth) & (np.abs(clip[:, 1]) <= depth)
+    indices = np.flatnonzero(visible)
+
+    # Prioritize the labels that are closest to the viewer.
+    indices = indices[np.argsort(depth[indices], kind="stable")][:maximum]
+
+    positions = clip[indices, 0:2] / depth[indices, None]
+    positions[:, 0] = (positions[:, 0] + 1.0) * 0.5 * region.width
+    positions[:, 1] = (positions[:, 1] + 1.0) * 0.5 * region.height
+
+    blf.size(0, 20)
+    for index, position in zip(indices.tolist(), positions.tolist()):
+        location, text, color, offset = cached_labels[index]
+        DrawText2D(color, (position[0] + offset[0], position[1] + offset[1]), text)
+
+@bpy.app.handlers.persistent
+def OnDepsgraphUpdate(scene, depsgraph):
+    global dirty, labels_dirty
+
+    # Moving objects or editing their link properties shows up as an object update,
+    # selection and visibility changes and scene settings such as "Always show links" show up as a scene update.
+    for update in depsgraph.updates:
+        if isinstance(update.id, bpy.types.Object):
+            link_grid.MarkObject(update.id.name)
+        elif isinstance(update.id, bpy.types.Scene):
+            link_grid.MarkVisibility()
+        else:
+            continue
+
+        dirty = True
+        labels_dirty = True
+
+# Animated objects move without a depsgraph update when the frame changes.
+@bpy.app.handlers.persistent
+def OnFrameChange(scene, depsgraph):
+    MarkDirty()
+
+@bpy.app.handlers.persistent
+def OnLoad(parameters):
+    MarkDirty()
+
+def RegisterLinkOverlay():
+    bpy.app.handlers.depsgraph_update_post.append(OnDepsgraphUpdate)
+    bpy.app.handlers.frame_change_post.append(OnFrameChange)
+    bpy.app.handlers.load_post.append(OnLoad)
+    link_handler = bpy.types.SpaceView3D.draw_handler_add(DrawEntityLinks, (), 'WINDOW', 'POST_VIEW')
+    text_handler = bpy.types.SpaceView3D.draw_handler_add(DrawEntityTexts, (), 'WINDOW', 'POST_PIXEL')
+    return link_handler, text_handler
+
+def UnregisterLinkOverlay(link_handler, text_handler):
+    bpy.types.SpaceView3D.draw_handler_remove(link_handler, 'WINDOW')
+    bpy.types.SpaceView3D.draw_handler_remove(text_handler, 'WINDOW')
+    bpy.app.handlers.load_post.remove(OnLoad)
+    bpy.app.handlers.frame_change_post.remove(OnFrameChange)
+    bpy.app.handlers.depsgraph_update_post.remove(OnDepsgraphUpdate)
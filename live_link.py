@@ -0,0 +1,182 @@
+# Talks to a running game over a local socket, so levels and assets can be reloaded without relaunching it.
+#
+# Every message is a small header followed by its payload:
+#   uint8 kind, uint32 payload size (little endian)
+# Command messages carry a UTF-8 JSON object with a "command" key:
+#   {"command" : "reload_level", "world" : "Levels/Name"}
+#   {"command" : "reload_asset", "type" : "mesh", "name" : "crate", "path" : "Models/crate.fbx"}
+#   {"command" : "apply_patch", "path" : "Levels/Name.patch.json"}
+#   {"command" : "camera", "location" : [x, y, z], "direction" : [x, y, z], "move_player" : false}
+# Camera pose messages are streamed while the editor camera moves, their payload is binary:
+#   float32 location x, y, z, float32 direction x, y, z (little endian, same convention as the camera command)
+#
+# Run this file with plain Python to start a stand-in for the game that prints every message it receives:
+#   python live_link.py [--port 7464]
+import sys
+import json
+import socket
+import struct
+import argparse
+
+default_port = 7464
+
+header = struct.Struct("<BI")
+kind_command = 0
+kind_camera_pose = 1
+
+camera_pose = struct.Struct("<6f")
+
+def EncodeMessage(kind, payload):
+    return header.pack(kind, len(payload)) + payload
+
+def EncodeCommand(command, arguments):
+    message = {"command" : command}
+    message.update(arguments)
+    return EncodeMessage(kind_command, json.dumps(message).encode("utf-8"))
+
+def EncodeCameraPose(location, direction):
+    return EncodeMessage(kind_camera_pose, camera_pose.pack(*location, *direction))
+
+def ReceiveExactly(connection, size):
+    data = b""
+    while len(data) < size:
+        chunk = connection.recv(size - len(data))
+        if len(chunk) == 0:
+            return None
+        data += chunk
+
+    return data
+
+# Returns the kind and payload of the next message, or None when the connection was closed.
+def ReceiveMessage(connection):
+    data = ReceiveExactly(connection, header.size)
+    if data == None:
+        return None
+
+    kind, size = header.unpack(data)
+    payload = ReceiveExactly(connection, size)
+    if payload == None:
+        return None
+
+    return kind, payload
+
+class LiveLink:
+    def __init__(self):
+        self.connection = None
+
+    def Connect(self, port, timeout = 0.25):
+        self.Close()
+        try:
+            self.connection = socket.create_connection(("127.0.0.1", port), timeout=timeout)
+            self.connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        except OSError:
+            self.connection = None
+
+        return self.connection != None
+
+    def IsConnected(self):
+        if self.connection == None:
+            return False
+
+        # The game never sends anything, so readable data of zero length means it closed the connection.
+        closed = False
+        try:
+            self.connection.setblocking(False)
+            closed = len(self.connection.recv(1, socket.MSG_PEEK)) == 0
+        except BlockingIOError:
+            pass
+        except OSError:
+            closed = True
+
+        if closed:
+            self.Close()
+            return False
+
+        self.connection.settimeout(0.25)
+        return True
+
+    def Close(self):
+        if self.connection == None:
+            return
+
+        try:
+            self.connection.close()
+        except OSError:
+            pass
+
+        self.connection = None
+
+    def Send(self, data):
+        if self.connection == None:
+            return False
+
+        try:
+            self.connection.sendall(data)
+        except OSError as e:
+            print("Live link lost. (" + str(e) + ")")
+            self.Close()
+            return False
+
+        return True
+
+    def SendCommand(self, command, **arguments):
+        return self.Send(EncodeCommand(command, arguments))
+
+    def SendReloadLevel(self, world):
+        return self.SendCommand("reload_level", world=world)
+
+    def SendReloadAsset(self, asset):
+        return self.SendCommand("reload_asset", type=asset["type"], name=asset["name"], path=asset["path"])
+
+    def SendApplyPatch(self, path):
+        return self.SendCommand("apply_patch", path=path)
+
+    def SendCamera(self, location, direction, move_player):
+        return self.SendCommand("camera", location=list(location), direction=list(direction), move_player=move_player)
+
+# Connection shared by the editor operators.
+connection = LiveLink()
+
+def DescribeMessage(kind, payload):
+    if kind == kind_command:
+        return payload.decode("utf-8")
+
+    if kind == kind_camera_pose and len(payload) == camera_pose.size:
+        return "camera pose " + " ".join(format(value, ".3f") for value in camera_pose.unpack(payload))
+
+    return "kind " + str(kind) + ", " + str(len(payload)) + " bytes"
+
+def RunServer(port):
+    server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    server.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    server.bind(("127.0.0.1", port))
+    server.listen(1)
+    print("Live link stand-in listening on port " + str(port) + ".")
+
+    try:
+        while True:
+            client, address = server.accept()
+            print("Editor connected from " + str(address[1]) + ".")
+
+            with client:
+                while True:
+                    message = ReceiveMessage(client)
+                    if message == None:
+                        break
+
+                    print(DescribeMessage(*message))
+
+            print("Editor disconnected.")
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.close()
+
+    return 0
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Stand-in for a game that accepts Shatter live link connections.")
+    parser.add_argument("--port", type=int, default=default_port, help="Port to listen on")
+    options = parser.parse_args()
+
+    sys.exit(RunServer(options.port))
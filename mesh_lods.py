@@ -0,0 +1,113 @@
+import os
+
+import bpy
+import bmesh
+
+import numpy as np
+
+from . import json_cache
+
+cache_version = 1
+
+# Meshes with fewer faces than this don't get any LODs, there is nothing to gain from decimating them.
+minimum_faces = 128
+
+# Fingerprints of the LODs that were written by earlier exports, keyed by the LOD asset name.
+previous_lods = {}
+
+# Fingerprints of the LODs that were written or found up to date during the current export.
+current_lods = {}
+
+def ParseNumbers(text):
+    numbers = []
+    for item in text.replace(",", " ").split():
+        try:
+            numbers.append(float(item))
+        except ValueError:
+            print("Invalid LOD value \"" + item + "\".")
+
+    return numbers
+
+# Returns the decimation ratio and switch distance of every LOD level, the full mesh is LOD 0.
+def GetLODLevels(context):
+    ratios = ParseNumbers(context.scene.shatter_lod_ratios)
+    distances = ParseNumbers(context.scene.shatter_lod_distances)
+    return [(ratio, distance) for ratio, distance in zip(ratios, distances) if ratio > 0.0 and ratio < 1.0]
+
+# Describes LOD settings that can't be used as they are, the export still uses whatever levels are valid.
+def GetLODSettingsWarning(context):
+    ratios = ParseNumbers(context.scene.shatter_lod_ratios)
+    distances = ParseNumbers(context.scene.shatter_lod_distances)
+
+    if len(ratios) != len(distances):
+        return "LOD ratios and distances don't match up (" + str(len(ratios)) + " ratios, " + str(len(distances)) + " distances), only " + str(min(len(ratios), len(distances))) + " LOD levels are exported."
+
+    if any(ratio <= 0.0 or ratio >= 1.0 for ratio in ratios):
+        return "LOD ratios have to be between 0 and 1, other ratios are skipped."
+
+    return ""
+
+# Collapses nearby vertices until roughly the given ratio of faces is left.
+# The merge distance is found through a binary search, each step welds a fresh copy of the mesh.
+def DecimateMesh(mesh, ratio, steps = 8):
+    target = max(1, int(len(mesh.polygons) * ratio))
+
+    positions = np.empty(len(mesh.vertices) * 3, dtype=np.float32)
+    mesh.vertices.foreach_get("co", positions)
+    positions = positions.reshape(-1, 3)
+    low = 0.0
+    high = float(np.max(positions.max(axis=0) - positions.min(axis=0))) * 0.5 if len(positions) > 0 else 0.0
+
+    best = None
+    for step in range(steps):
+        distance = (low + high) * 0.5
+        bm = bmesh.new()
+        bm.from_mesh(mesh)
+        bmesh.ops.remove_doubles(bm, verts=bm.verts, dist=distance)
+
+        if len(bm.faces) > target:
+            low = distance
+            bm.free()
+            continue
+
+        high = distance
+        if best != None:
+            best.free()
+        best = bm
+
+    # None of the distances removed enough faces, fall back to the largest one.
+    if best == None:
+        best = bmesh.new()
+        best.from_mesh(mesh)
+        bmesh.ops.remove_doubles(best, verts=best.verts, dist=high)
+
+    best.to_mesh(mesh)
+    best.free()
+
+def ShouldGenerateLODs(context, obj):
+    return context.scene.shatter_export_lods and len(obj.data.polygons) >= minimum_faces
+
+def GetCachePath(context):
+    return os.path.normpath(bpy.path.abspath(context.scene.shatter_export_path)) + "/LODs.cache"
+
+def LoadLODCache(context):
+    previous_lods.clear()
+    current_lods.clear()
+
+    cache = json_cache.LoadCache(GetCachePath(context), cache_version, "LOD cache")
+    if cache != None:
+        previous_lods.update(cache.get("lods", {}))
+
+def SaveLODCache(context):
+    json_cache.SaveCache(GetCachePath(context), cache_version, "LOD cache", {
+        "lods" : json_cache.MergeEntries(previous_lods, current_lods)
+    })
+
+def GetLODFingerprint(mesh_fingerprint, ratio):
+    return mesh_fingerprint + ":" + format(ratio, ".4f")
+
+def IsLODUnchanged(asset_name, fingerprint, output_path):
+    return json_cache.IsUnchanged(previous_lods, asset_name, fingerprint, output_path)
+
+def StoreLOD(asset_name, fingerprint):
+    current_lods[asset_name] = fingerprint
@@ -0,0 +1,107 @@
+import os
+import struct
+
+import numpy as np
+
+# Layout of a native Shatter mesh file: (all little endian)
+#   header    magic, version, flags, vertex count, index count
+#   bounds    minimum xyz, maximum xyz (float32)
+#   vertices  position xyz, normal xyz, [uv xy], [tangent xyzw] (float32, interleaved)
+#   indices   triangle list (uint32)
+extension = ".lm"
+magic = b"SHLM"
+version = 1
+
+flag_uv = 1
+flag_tangent = 2
+
+def GetLoopData(collection, attribute, components, dtype=np.float32):
+    data = np.empty(len(collection) * components, dtype=dtype)
+    collection.foreach_get(attribute, data)
+    return data.reshape(-1, components) if components > 1 else data
+
+def BuildVertices(mesh):
+    flags = 0
+
+    # Blender versions before 4.1 only fill in the loop normals on request.
+    if hasattr(mesh, "calc_normals_split"):
+        mesh.calc_normals_split()
+
+    has_uv = mesh.uv_layers.active != None
+    if has_uv:
+        try:
+            mesh.calc_tangents()
+            flags |= flag_tangent
+        except RuntimeError as e:
+            print("Failed to calculate tangents for " + mesh.name + ". (" + str(e) + ")")
+        flags |= flag_uv
+
+    positions = GetLoopData(mesh.vertices, "co", 3)
+    vertex_indices = GetLoopData(mesh.loops, "vertex_index", 1, np.int32)
+
+    attributes = [positions[vertex_indices], GetLoopData(mesh.loops, "normal", 3)]
+    if flags & flag_uv:
+        attributes.append(GetLoopData(mesh.uv_layers.active.data, "uv", 2))
+    if flags & flag_tangent:
+        attributes.append(GetLoopData(mesh.loops, "tangent", 3))
+        attributes.append(GetLoopData(mesh.loops, "bitangent_sign", 1)[:, None])
+
+    return flags, np.hstack(attributes).astype(np.float32)
+
+# Moves the mesh into the engine's space, the same axis conversion and unit scale are used for FBX files.
+def ConvertVertices(flags, vertices, global_matrix):
+    conversion = np.array(global_matrix.to_3x3(), dtype=np.float32)
+    rotation = np.array(global_matrix.to_3x3().normalized(), dtype=np.float32)
+
+    vertices[:, 0:3] = vertices[:, 0:3] @ conversion.T
+    vertices[:, 3:6] = vertices[:, 3:6] @ rotation.T
+    if flags & flag_tangent:
+        tangent = 8 if flags & flag_uv else 6
+        vertices[:, tangent:tangent + 3] = vertices[:, tangent:tangent + 3] @ rotation.T
+
+    return vertices
+
+# Writes the evaluated mesh of the object, including its modifiers.
+def WriteMesh(obj, depsgraph, export_path, global_matrix):
+    evaluated = obj.evaluated_get(depsgraph)
+    mesh = evaluated.to_mesh()
+
+    try:
+        return WriteMeshData(mesh, obj.name, export_path, global_matrix)
+    finally:
+        evaluated.to_mesh_clear()
+
+def WriteMeshData(mesh, name, export_path, global_matrix):
+    try:
+        mesh.calc_loop_triangles()
+        flags, loop_vertices = BuildVertices(mesh)
+        triangle_loops = GetLoopData(mesh.loop_triangles, "loops", 3, np.int32).ravel()
+    except Exception as e:
+        print("Failed to read mesh data for " + name + ". (" + str(e) + ")")
+        return False
+
+    loop_vertices = ConvertVertices(flags, loop_vertices, global_matrix)
+
+    # Loops that share every attribute collapse into a single vertex.
+    vertices, remap = np.unique(loop_vertices, axis=0, return_inverse=True)
+    indices = remap.reshape(-1)[triangle_loops].astype(np.uint32)
+
+    if len(vertices) > 0:
+        minimum = vertices[:, 0:3].min(axis=0)
+        maximum = vertices[:, 0:3].max(axis=0)
+    else:
+        minimum = maximum = np.zeros(3, dtype=np.float32)
+
+    try:
+        os.makedirs(os.path.dirname(export_path), exist_ok=True)
+        with open(export_path, 'wb') as mesh_file:
+            mesh_file.write(struct.pack("<4sIIII", magic, version, flags, len(vertices), len(indices)))
+            mesh_file.write(struct.pack("<6f", *minimum, *maximum))
+            mesh_file.write(vertices.astype("<f4").tobytes())
+            mesh_file.write(indices.astype("<u4").tobytes())
+    except Exception as e:
+        print("Failed to write native mesh. (" + str(e) + ")")
+        return False
+
+    print("Export path: " + export_path + " (" + str(len(vertices)) + " vertices, " + str(len(indices) // 3) + " triangles)")
+    return True
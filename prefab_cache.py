@@ -0,0 +1,35 @@
+import os
+
+import bpy
+
+from . import json_cache
+
+cache_version = 1
+
+# Fingerprints of the prefabs that were written by earlier exports, keyed by the prefab path.
+previous_prefabs = {}
+
+# Fingerprints of the prefabs that were written or found up to date during the current export.
+current_prefabs = {}
+
+def GetCachePath(context):
+    return os.path.normpath(bpy.path.abspath(context.scene.shatter_export_path)) + "/Prefabs/Prefabs.cache"
+
+def LoadPrefabCache(context):
+    previous_prefabs.clear()
+    current_prefabs.clear()
+
+    cache = json_cache.LoadCache(GetCachePath(context), cache_version, "prefab cache")
+    if cache != None:
+        previous_prefabs.update(cache.get("prefabs", {}))
+
+def SavePrefabCache(context):
+    json_cache.SaveCache(GetCachePath(context), cache_version, "prefab cache", {
+        "prefabs" : json_cache.MergeEntries(previous_prefabs, current_prefabs)
+    })
+
+def IsPrefabUnchanged(prefab_path, fingerprint, output_path):
+    return json_cache.IsUnchanged(previous_prefabs, prefab_path, fingerprint, output_path)
+
+def StorePrefab(prefab_path, fingerprint):
+    current_prefabs[prefab_path] = fingerprint
@@ -23,10 +23,32 @@ from bpy_extras.io_utils import (
 import json
 import subprocess
 import copy
+import hashlib
 import uuid
+import time
+
+import numpy as np
 
 from threading import Timer, active_count
 
+from . import export_cache
+from . import export_workers
+from . import native_mesh
+from . import texture_cache
+from . import entity_schema
+from . import link_overlay
+from . import export_profiler
+from . import live_link
+from . import camera_stream
+from . background_export import BackgroundExport
+from . level_writer import LevelWriter
+from . import level_patch
+from . import prefab_cache
+from . import mesh_lods
+from . level_patch import LevelPatch
+from . import level_cells
+from . level_cells import CellWriter
+
 collision_types = {
     "shatter_collision_triangle" : "triangle",
     "shatter_collision_aabb" : "aabb",
@@ -97,21 +119,22 @@ def GetTexture(obj):
 
     return None
 
+# Returns whether the texture is copied to the game directory.
 def ExportTexture(context, texture, asset):
     if len(texture['path']) == 0:
         print("Texture path not set. (" + texture["name"] + ")")
-        return
+        return False
     try:
         input_path = texture['path']
-        output_path = bpy.path.abspath(context.scene.shatter_game_path + asset["path"])
-        output_dir = os.path.dirname(output_path)
-        if not os.path.isdir(output_dir):
-            os.mkdir(output_dir)
+        output_path = os.path.normpath(bpy.path.abspath(context.scene.shatter_game_path + asset["path"]))
 
-        shutil.copy(input_path, output_path)
+        # The copy itself happens in the background, it's finished at the end of the export.
+        return texture_cache.QueueTextureCopy(input_path, output_path)
     except Exception as e:
         print("Failed to export texture. (" + str(e) + ")");
 
+    return False
+
 def GetRelativePath(value):
     try:
         game_path = bpy.path.abspath(bpy.context.scene.shatter_game_path)
@@ -202,151 +225,6 @@ class SLS_PT_ShatterObjectProperties(bpy.types.Panel):
                 row = layout.row()
                 row.prop(kv, "value", text=kv.name)
 
-def DrawText2D(color,position, text):
-    font_id = 0
-    blf.position(font_id, position[0], position[1], 0)
-    blf.color(font_id, 0.0, 0.0, 0.0, 0.75)
-    blf.size(font_id, 20)
-    blf.draw(font_id, text)
-
-    blf.position(font_id, position[0] - 1.0 , position[1] + 1.0, 0)
-    blf.color(font_id, color[0], color[1], color[2], color[3])
-    blf.size(font_id, 20)
-    blf.draw(font_id, text)
-
-def DrawText(color, position, text, offset=(0,0)):
-    region = bpy.context.region
-    region_3d = bpy.context.space_data.region_3d
-    position2D = bpy_extras.view3d_utils.location_3d_to_region_2d(region, region_3d, position)
-
-    position2D[0] += offset[0]
-    position2D[1] += offset[1]
-
-    DrawText2D(color,position2D,text)
-
-def DrawLine(color, start, end):
-    shader = gpu.shader.from_builtin('UNIFORM_COLOR')
-    batch = batch_for_shader(shader, 'LINES', {"pos": [start,end]})
-    shader.bind()
-    shader.uniform_float("color", color)
-    batch.draw(shader)
-
-def DrawLinkRaw(obj, prop, location, color):
-    if obj.shatter_type not in bpy.context.scene.shatter_definitions:
-        return
-    
-    for param in bpy.context.scene.shatter_definitions[obj.shatter_type]:
-        if param["type"] == prop.type and param["key"] == prop.name:
-            if "debug_color" in param:
-                DrawLine(param["debug_color"], obj.location, location)
-            else:
-                DrawLine(color, obj.location, location)
-
-def DrawLinkEntity(obj, prop, entity):
-    if entity != None:
-        DrawLinkRaw(obj,prop,entity.location, (0.0,0.6,0.3, 1.0))
-
-def DrawLinkVector(obj, prop, vector):
-    if vector != None:
-        DrawLinkRaw(obj,prop,vector, (0.1,0.0,0.5, 1.0))
-
-def DrawEntityLinkForObject(obj):
-    for prop in obj.shatter_properties:
-        if prop.type == "entities":
-            for entity in prop.value_c:
-                DrawLinkEntity(obj, prop, entity.value)
-        elif prop.type == "entity":
-            DrawLinkEntity(obj,prop,prop.value_o)
-        elif prop.type == "vector":
-            DrawLinkVector(obj,prop,prop.value_v)
-
-def DrawEntityTextForObject(obj):
-    color = (0.7,0.7,0.7, 1.0)
-    scene = bpy.context.scene
-
-    draw_label = True
-    offset = [0,0]
-    for prop in obj.shatter_properties:
-        if prop.type == "entities":
-            for entity in prop.value_c:
-                if hasattr(entity.value, "location") == False:
-                    continue
-
-                if draw_label:
-                    DrawText(color, entity.value.location, prop.name, tuple(offset))
-                    draw_label = False
-                    offset[0] += 10
-                    offset[1] -= 20
-                
-                if entity.value != None:
-                    if obj.shatter_type not in bpy.context.scene.shatter_definitions:
-                        continue
-
-                    for param in scene.shatter_definitions[obj.shatter_type]:
-                        if param["type"] == prop.type and param["key"] == prop.name:
-                            if "debug_color" in param:
-                                text = entity.name + " execute " + entity.extra + "()"
-                                if len(entity.extra) == 0:
-                                    text = entity.value.name
-
-                                DrawText(param["debug_color"], entity.value.location, text, tuple(offset))
-                            else:
-                                DrawText(color, entity.value.location, entity.name + " execute " + entity.extra + "()", tuple(offset))
-                            offset[1] -= 20
-                    draw_label = True
-                    offset = [0,0]
-        elif prop.type == "entity":
-            entity = prop.value_o
-
-            if hasattr(entity, "location") == False:
-                continue
-
-            if draw_label:
-                DrawText(color, entity.location, prop.name, tuple(offset))
-                draw_label = False
-                offset[0] += 10
-                offset[1] -= 20
-            
-            if entity != None:
-                text = entity.name
-
-                if obj.shatter_type not in bpy.context.scene.shatter_definitions:
-                    continue
-
-                for param in scene.shatter_definitions[obj.shatter_type]:
-                    if param["type"] == prop.type and param["key"] == prop.name:
-                        if "debug_color" in param:
-                            DrawText(param["debug_color"], entity.location, text, tuple(offset))
-                        else:
-                            DrawText(color, entity.location, text, tuple(offset))
-                        offset[1] -= 20
-                draw_label = True
-                offset = [0,0]
-
-
-# This function goes through all objects that have link properties and draws the links.
-def DrawEntityLinks():
-    objects = bpy.context.selected_objects
-    if bpy.context.scene.shatter_links_drawall == True:
-        objects = bpy.context.visible_objects
-
-    if len(objects) > 0:
-        for obj in objects:
-            DrawEntityLinkForObject(obj)
-        return
-
-    #for obj in bpy.context.scene.objects:
-    #    DrawEntityLinkForObject(obj)
-
-def DrawEntityTexts():
-    if len(bpy.context.selected_objects) > 0:
-        for obj in bpy.context.selected_objects:
-            DrawEntityTextForObject(obj)
-        return
-
-    #for obj in bpy.context.scene.objects:
-    #    DrawEntityTextForObject(obj)
-
 def LinkToObject(target, link, clear=False):
     for prop in target.shatter_properties:
             if prop.name == "links" and prop.type == "entities":
@@ -697,28 +575,13 @@ class SLS_PT_ShatterObject(bpy.types.Panel):
         if obj.shatter_type in bpy.context.scene.shatter_object_types:
             description = [bpy.context.scene.shatter_object_types[obj.shatter_type].value]
 
-            if obj.shatter_type in bpy.context.scene.shatter_definitions:
-                output_line = ""
-                for entry in bpy.context.scene.shatter_definitions[obj.shatter_type]:
-                    first_entry = len(output_line) == 0
-                    if entry['type'] == "input":
-                        if not first_entry:
-                            output_line += ", "
-                        output_line += str(entry['key'])
-                if len(output_line) > 0:
-                    output_line = "Inputs: " + output_line
-                    description.append(output_line)
-
-                output_line = ""
-                for entry in bpy.context.scene.shatter_definitions[obj.shatter_type]:
-                    first_entry = len(output_line) == 0
-                    if entry['type'] == "output":
-                        if not first_entry:
-                            output_line += ", "
-                        output_line += str(entry['key'])
-                if len(output_line) > 0:
-                    output_line = "Outputs: " + output_line
-                    description.append(output_line)
+            schema = bpy.context.scene.shatter_schema.get(obj.shatter_type)
+            if schema != None:
+                if len(schema.inputs) > 0:
+                    description.append("Inputs: " + ", ".join(schema.inputs))
+
+                if len(schema.outputs) > 0:
+                    description.append("Outputs: " + ", ".join(schema.outputs))
 
             for line in description:
                 # Ignore if we aren't actually displaying any information.
@@ -782,9 +645,30 @@ axis_up = "Y"
 
 generated_meshes = []
 generated_textures = []
+changed_assets = [] # Assets that were written to the game directory during the last export.
+written_assets = set() # Paths of the asset files that were handled during the current export.
+exported_prefabs = {} # Full collection name -> prefab path of the prefabs handled during the current export.
+prefab_owners = {} # Prefab path -> full name of the collection that was exported to it.
+generated_lods = {} # Mesh asset name -> LOD levels that entities using the mesh refer to.
+queued_assets = {} # Mesh asset name -> asset of the meshes that were handed off to the workers.
+failed_assets = [] # Names of the assets that couldn't be written during the last export.
+excluded_collections = set()
+export_depsgraph = None
 def ResetExporter():
+    global export_depsgraph
+    export_depsgraph = None
+
     generated_meshes.clear()
     generated_textures.clear()
+    changed_assets.clear()
+    written_assets.clear()
+    exported_prefabs.clear()
+    prefab_owners.clear()
+    generated_lods.clear()
+    queued_assets.clear()
+    failed_assets.clear()
+    excluded_collections.clear()
+    export_workers.ResetJobs()
 
 def GetBasePath(context):
     game_path = os.path.normpath(bpy.path.abspath(context.scene.shatter_game_path))
@@ -882,6 +766,13 @@ def ExportAnimations(operator,context):
 
     bpy.context.view_layer.update()
 
+def GetMeshExtension(context, armature = None):
+    # Skinned and animated meshes still need the FBX exporter.
+    if context.scene.shatter_mesh_format == "native" and armature is None and context.scene.shatter_animation_only == False:
+        return native_mesh.extension
+
+    return ".fbx"
+
 @orientation_helper(axis_forward='-Z', axis_up='Y')
 def GenerateAsset(operator,context,exported,obj, armature = None):
     if obj.type == "MESH":
@@ -901,11 +792,30 @@ def GenerateAsset(operator,context,exported,obj, armature = None):
         asset = {}
         asset["type"] = "mesh"
         asset["name"] = asset_name
-        asset["path"] = GetBasePathRelative(context) + "Models/" + asset_name + ".fbx"
+        asset["path"] = GetBasePathRelative(context) + "Models/" + asset_name + GetMeshExtension(context, armature)
         exported["assets"].append(asset)
         generated_meshes.append(asset_name)
 
-        texture = GetTexture(obj)
+        # Prefabs list their own assets, but every file only has to be written once per export.
+        already_written = asset["path"] in written_assets
+        written_assets.add(asset["path"])
+
+        with export_profiler.Phase("GetTexture", {"object" : obj.name}):
+            texture = GetTexture(obj)
+
+        # Skip the expensive export work if the mesh hasn't changed since the last export.
+        # Skinned meshes bake their animations into the FBX, so those are always exported.
+        fingerprint = None
+        unchanged = False
+        if context.scene.shatter_export_incremental and not animation_only and armature is None and not already_written:
+            try:
+                fingerprint = export_cache.GetMeshFingerprint(context, GetExportDepsgraph(context), obj, texture)
+                output_path = os.path.normpath(bpy.path.abspath(context.scene.shatter_game_path)) + "/" + asset["path"]
+                unchanged = export_cache.IsMeshUnchanged(asset_name, fingerprint, output_path)
+            except Exception as e:
+                print("Failed to fingerprint mesh " + asset_name + ". (" + str(e) + ")")
+                fingerprint = None
+
         if texture != None and texture['name'] not in generated_textures and animation_only != True:
             texture_asset = {}
             texture_asset["type"] = "texture"
@@ -914,97 +824,209 @@ def GenerateAsset(operator,context,exported,obj, armature = None):
             exported["assets"].append(texture_asset)
             generated_textures.append(texture['name'])
 
-            if context.scene.shatter_export_textures == True:
-                ExportTexture(context, texture, texture_asset)
+            # An unchanged mesh means its texture source is unchanged as well, but the copy may still have been deleted.
+            texture_missing = unchanged and not os.path.isfile(os.path.normpath(bpy.path.abspath(context.scene.shatter_game_path + texture_asset["path"])))
+            if context.scene.shatter_export_textures == True and (not unchanged or texture_missing) and texture_asset["path"] not in written_assets:
+                written_assets.add(texture_asset["path"])
+                if ExportTexture(context, texture, texture_asset):
+                    changed_assets.append(texture_asset)
+
+        if not animation_only and armature is None and mesh_lods.ShouldGenerateLODs(context, obj):
+            GenerateLODs(operator, context, exported, obj, asset, fingerprint)
 
         if context.scene.shatter_export_meshes == False and animation_only == False:
             return
 
-        global_matrix = (axis_conversion(to_forward=axis_forward,
-                                         to_up=axis_up,
-                                         ).to_4x4())
+        if already_written:
+            return
+
+        if unchanged:
+            print("Skipping unchanged mesh: " + asset_name)
+            export_cache.StoreMeshFingerprint(asset_name, fingerprint)
+            return
+
+        export_dir = os.path.normpath(bpy.path.abspath(context.scene.shatter_game_path))
+        export_path = export_dir + "/" + asset["path"]
+
+        # Hand the mesh off to the background workers if they're enabled.
+        if not animation_only and export_workers.IsEnabled(context):
+            export_workers.QueueMeshJob(obj, armature, asset_name, export_path, fingerprint)
+            queued_assets[asset_name] = asset
+            return
+
+        with export_profiler.Phase("ExportMesh", {"asset" : asset_name}):
+            success = ExportMesh(operator, context, obj, export_path, armature, animation_only)
+
+        if success:
+            changed_assets.append(asset)
+        else:
+            failed_assets.append(asset_name)
 
-        # Set global matrix to identity to prevent modifier application issues.
-        # global_matrix = Matrix()
-
-        keywords = {
-            'use_selection': True, 
-            'use_active_collection': False, 
-            'global_scale': 1.0, 
-            'apply_unit_scale': True,  # Make sure to apply the unit scale
-            'apply_scale_options': 'FBX_SCALE_ALL', # Scale all needed for Shatter
-            'bake_space_transform': False, 
-            'object_types': {'OTHER', 'MESH', 'ARMATURE', 'EMPTY', 'LIGHT', 'CAMERA'}, 
-            'use_mesh_modifiers': True, 
-            'use_mesh_modifiers_render': True, 
-            'mesh_smooth_type': 'OFF', 
-            'use_subsurf': False, 
-            'use_mesh_edges': False, 
-            'use_tspace': True,  # Export tangent space vectors
-            'use_custom_props': False, 
-            'add_leaf_bones': True, 
-            'primary_bone_axis': 'Y', 
-            'secondary_bone_axis': 'X', 
-            'use_armature_deform_only': False, 
-            'armature_nodetype': 'NULL', 
-            'bake_anim': True, 
-            'bake_anim_use_all_bones': True, 
-            'bake_anim_use_nla_strips': True, 
-            'bake_anim_use_all_actions': True, 
-            'bake_anim_force_startend_keying': True, 
-            'bake_anim_step': 1.0, 
-            'bake_anim_simplify_factor': 1.0, 
-            'path_mode': 'AUTO', 
-            'embed_textures': False, 
-            'batch_mode': 'OFF', 
-            'use_batch_own_dir': True, 
-            'use_metadata': True, 
-            'axis_forward': '-Z', 
-            'axis_up': 'Y',
-            "global_matrix" : global_matrix
-        }
-
-        original_matrix = copy.deepcopy(obj.matrix_world)
-        obj.matrix_world = Matrix()
-
-        if animation_only == False:
-            keywords["context_objects"] = [obj]
+        if success and fingerprint != None:
+            export_cache.StoreMeshFingerprint(asset_name, fingerprint)
+
+# Adds a decimated version of the mesh for every LOD level and exports the ones that changed.
+def GenerateLODs(operator, context, exported, obj, asset, fingerprint):
+    lods = []
+    base_path, extension = os.path.splitext(asset["path"])
+    for index, (ratio, distance) in enumerate(mesh_lods.GetLODLevels(context)):
+        suffix = "_lod" + str(index + 1)
+
+        lod_asset = {}
+        lod_asset["type"] = "mesh"
+        lod_asset["name"] = asset["name"] + suffix
+        lod_asset["path"] = base_path + suffix + extension
+        exported["assets"].append(lod_asset)
+
+        lods.append({"mesh" : lod_asset["name"], "distance" : str(distance)})
+
+        if context.scene.shatter_export_meshes == False or lod_asset["path"] in written_assets:
+            continue
+
+        written_assets.add(lod_asset["path"])
+
+        # Decimating is slow, so LODs are only generated again when the mesh itself changed.
+        if fingerprint == None:
+            with export_profiler.Phase("Fingerprint", {"asset" : asset["name"]}):
+                fingerprint = export_cache.GetMeshFingerprint(context, GetExportDepsgraph(context), obj)
+
+        lod_fingerprint = mesh_lods.GetLODFingerprint(fingerprint, ratio)
+        export_path = os.path.normpath(bpy.path.abspath(context.scene.shatter_game_path)) + "/" + lod_asset["path"]
+        if mesh_lods.IsLODUnchanged(lod_asset["name"], lod_fingerprint, export_path):
+            print("Skipping unchanged LOD: " + lod_asset["name"])
+            mesh_lods.StoreLOD(lod_asset["name"], lod_fingerprint)
+            continue
+
+        with export_profiler.Phase("ExportLOD", {"asset" : lod_asset["name"]}):
+            success = ExportMeshLOD(operator, context, obj, export_path, ratio)
+
+        if success:
+            changed_assets.append(lod_asset)
+            mesh_lods.StoreLOD(lod_asset["name"], lod_fingerprint)
         else:
-            keywords["context_objects"] = []
-            keywords["bake_anim"] = True
-            keywords["bake_anim_use_all_bones"] = True
-            keywords["bake_anim_use_nla_strips"] = True
-            keywords["bake_anim_use_all_actions"] = False
-            keywords["bake_anim_force_startend_keying"] = True
-            keywords["bake_anim_step"] = 1.0
-            keywords["bake_anim_simplify_factor"] = 1.0
-            keywords["batch_mode"] = "SCENE"
-
-        if armature != None:
-            keywords["context_objects"].append(armature)
+            failed_assets.append(lod_asset["name"])
 
+    generated_lods[asset["name"]] = lods
+
+# Exports a decimated copy of the evaluated mesh, neither the object nor the scene are changed.
+def ExportMeshLOD(operator, context, obj, export_path, ratio):
+    depsgraph = GetExportDepsgraph(context)
+    try:
+        mesh = bpy.data.meshes.new_from_object(obj.evaluated_get(depsgraph), preserve_all_data_layers=True, depsgraph=depsgraph)
+    except Exception as e:
+        print("Failed to read mesh data for " + obj.name + ". (" + str(e) + ")")
+        return False
+
+    try:
+        mesh_lods.DecimateMesh(mesh, ratio)
+
+        if export_path.endswith(native_mesh.extension):
+            return native_mesh.WriteMeshData(mesh, obj.name, export_path, GetNativeMatrix(context))
+
+        # The FBX writer needs an object, this one isn't linked to any scene so it's never evaluated.
+        lod_object = bpy.data.objects.new(obj.name, mesh)
         try:
-            export_dir = os.path.normpath(bpy.path.abspath(context.scene.shatter_game_path))
-            export_path = export_dir + "/" + asset["path"]
-            models_dir = os.path.dirname(export_path)
-
-            print("Export directory: " + export_dir)
-            print("Export path: " + export_path)
-            print("Model directory: " + models_dir)
-
-            if not os.path.isdir(models_dir):
-                print("Creating directory: " + models_dir)
-                try:
-                    os.mkdir(models_dir)
-                except Exception as e:
-                    print("Error: " + str(e))
-
-            ExportData(operator,context,export_path, False, animation_only, **keywords)
-        except Exception as e:
-            print("GenerateAsset failed: " + str(e) + ".")
-        
-        obj.matrix_world = original_matrix
-        bpy.context.view_layer.update()
+            return ExportMesh(operator, context, lod_object, export_path)
+        finally:
+            bpy.data.objects.remove(lod_object)
+    except Exception as e:
+        print("Failed to decimate " + obj.name + ". (" + str(e) + ")")
+        return False
+    finally:
+        bpy.data.meshes.remove(mesh)
+
+# Native meshes get the same axis conversion and unit scale as FBX files.
+def GetNativeMatrix(context):
+    return axis_conversion(to_forward=axis_forward, to_up=axis_up).to_4x4() @ Matrix.Scale(context.scene.unit_settings.scale_length, 4)
+
+def ExportMesh(operator, context, obj, export_path, armature = None, animation_only = False):
+    if export_path.endswith(native_mesh.extension):
+        return native_mesh.WriteMesh(obj, GetExportDepsgraph(context), export_path, GetNativeMatrix(context))
+
+    # The FBX writer places root objects at global_matrix @ matrix_world, undoing the world transform there exports the mesh in its local space.
+    # Only the axis conversion is left on the root, the unit scale is still applied through apply_unit_scale.
+    global_matrix = (axis_conversion(to_forward=axis_forward,
+                                     to_up=axis_up,
+                                     ).to_4x4())
+    if not animation_only:
+        global_matrix = global_matrix @ obj.matrix_world.inverted_safe()
+
+    # Set global matrix to identity to prevent modifier application issues.
+    # global_matrix = Matrix()
+
+    keywords = {
+        'use_selection': True, 
+        'use_active_collection': False, 
+        'global_scale': 1.0, 
+        'apply_unit_scale': True,  # Make sure to apply the unit scale
+        'apply_scale_options': 'FBX_SCALE_ALL', # Scale all needed for Shatter
+        'bake_space_transform': False, 
+        'object_types': {'OTHER', 'MESH', 'ARMATURE', 'EMPTY', 'LIGHT', 'CAMERA'}, 
+        'use_mesh_modifiers': True, 
+        'use_mesh_modifiers_render': True, 
+        'mesh_smooth_type': 'OFF', 
+        'use_subsurf': False, 
+        'use_mesh_edges': False, 
+        'use_tspace': True,  # Export tangent space vectors
+        'use_custom_props': False, 
+        'add_leaf_bones': True, 
+        'primary_bone_axis': 'Y', 
+        'secondary_bone_axis': 'X', 
+        'use_armature_deform_only': False, 
+        'armature_nodetype': 'NULL', 
+        'bake_anim': True, 
+        'bake_anim_use_all_bones': True, 
+        'bake_anim_use_nla_strips': True, 
+        'bake_anim_use_all_actions': True, 
+        'bake_anim_force_startend_keying': True, 
+        'bake_anim_step': 1.0, 
+        'bake_anim_simplify_factor': 1.0, 
+        'path_mode': 'AUTO', 
+        'embed_textures': False, 
+        'batch_mode': 'OFF', 
+        'use_batch_own_dir': True, 
+        'use_metadata': True, 
+        'axis_forward': '-Z', 
+        'axis_up': 'Y',
+        "global_matrix" : global_matrix
+    }
+
+    if animation_only == False:
+        keywords["context_objects"] = [obj]
+    else:
+        keywords["context_objects"] = []
+        keywords["bake_anim"] = True
+        keywords["bake_anim_use_all_bones"] = True
+        keywords["bake_anim_use_nla_strips"] = True
+        keywords["bake_anim_use_all_actions"] = False
+        keywords["bake_anim_force_startend_keying"] = True
+        keywords["bake_anim_step"] = 1.0
+        keywords["bake_anim_simplify_factor"] = 1.0
+        keywords["batch_mode"] = "SCENE"
+
+    if armature != None:
+        keywords["context_objects"].append(armature)
+
+    success = False
+    try:
+        models_dir = os.path.dirname(export_path)
+
+        print("Export path: " + export_path)
+        print("Model directory: " + models_dir)
+
+        if not os.path.isdir(models_dir):
+            print("Creating directory: " + models_dir)
+            try:
+                os.mkdir(models_dir)
+            except Exception as e:
+                print("Error: " + str(e))
+
+        ExportData(operator,context,export_path, False, animation_only, **keywords)
+        success = True
+    except Exception as e:
+        print("GenerateAsset failed: " + str(e) + ".")
+
+    return success
 
 def GetShader(obj, texture = None):
     if( obj.shatter_shader_type == "custom"):
@@ -1015,35 +1037,92 @@ def GetShader(obj, texture = None):
     
     return "DefaultGrid"
 
-def ParseNode(obj, entity):
+# The evaluated depsgraph is shared by everything that is exported in one go.
+def GetExportDepsgraph(context):
+    global export_depsgraph
+    if export_depsgraph == None:
+        export_depsgraph = context.evaluated_depsgraph_get()
+
+    return export_depsgraph
+
+def ClearExportDepsgraph():
+    global export_depsgraph
+    export_depsgraph = None
+
+def ParseNode(context, obj, entity):
     if obj.type != "MESH":
         return
     
-    deps = bpy.context.evaluated_depsgraph_get()
-    eval = obj.evaluated_get(deps)
+    eval = obj.evaluated_get(GetExportDepsgraph(context))
+    vertices = eval.data.vertices
+    edges = eval.data.edges
 
-    nodes = ""
-    for vertex in eval.data.vertices:
-        position = obj.matrix_world @ vertex.co
-        nodes += str(vertex.index) + "," + VectorToString(position) + ";"
-    
-    connections = ""
-    for edge in eval.data.edges:
-        connections += str(edge.vertices[0]) + "," + str(edge.vertices[1]) + ";"
+    positions = np.empty(len(vertices) * 3, dtype=np.float64)
+    vertices.foreach_get("co", positions)
+    positions = positions.reshape(-1, 3)
+
+    # Transform all of the nodes into world space at once.
+    matrix = np.array(obj.matrix_world)
+    positions = positions @ matrix[0:3, 0:3].T + matrix[0:3, 3]
+
+    connections = np.empty(len(edges) * 2, dtype=np.int32)
+    edges.foreach_get("vertices", connections)
+
+    if context.scene.shatter_compact_nodes:
+        entity["nodes"] = positions.ravel().tolist()
+        entity["edges"] = connections.tolist()
+        return
 
-    entity["nodes"] = nodes
-    entity["edges"] = connections
+    # Vertex indices are implied by their order, but the text format spells them out.
+    nodes = np.column_stack((np.arange(len(positions)), positions))
+    entity["nodes"] = ("%d,%f %f %f;" * len(nodes)) % tuple(nodes.ravel().tolist())
+    entity["edges"] = ("%d,%d;" * len(edges)) % tuple(connections.tolist())
 
     return
 
-def ParseObject(operator,context,exported, obj, recurse = True, parent = None):
+# Returns the location, rotation and scale the object would have if it was moved by the collection instance that spawned it.
+def GetObjectTransform(obj, parent = None):
+    if parent == None:
+        return obj.location, obj.rotation_euler, obj.scale
+
+    matrix = parent.matrix_world @ obj.matrix_world
+
+    # Express the composed transform relative to the object's own parent, like assigning matrix_world would.
+    if obj.parent:
+        matrix = (obj.parent.matrix_world @ obj.matrix_parent_inverse).inverted_safe() @ matrix
+
+    location, rotation, scale = matrix.decompose()
+    return location, rotation.to_euler(obj.rotation_euler.order, obj.rotation_euler), scale
+
+# Collects the names of all collections that are hidden in the viewport or disabled for rendering, hidden parents hide their children too.
+# Excluding a collection from the view layer doesn't hide it, instanced collections are usually kept there.
+def GatherExcludedCollections(layer_collection, hidden = False):
+    for child in layer_collection.children:
+        child_hidden = hidden or child.hide_viewport or child.collection.hide_render
+        if child_hidden:
+            excluded_collections.add(child.collection.name)
+
+        GatherExcludedCollections(child, child_hidden)
+
+# Members of an instanced collection are exported once for every instance, each copy gets a uuid of its own.
+def GetMemberUUID(instancer, obj):
+    if len(instancer.shatter_uuid) == 0:
+        instancer.shatter_uuid = str( uuid.uuid4() )
+
+    try:
+        namespace = uuid.UUID(instancer.shatter_uuid)
+    except ValueError:
+        namespace = uuid.uuid5(uuid.NAMESPACE_URL, instancer.shatter_uuid)
+
+    return str( uuid.uuid5(namespace, obj.name) )
+
+def ParseObject(operator,context,exported, obj, recurse = True, parent = None, check_visibility = True):
     if obj.shatter_export == False:
         return
 
-    for collection in obj.users_collection:
-        if collection.name in context.view_layer.layer_collection.children:
-            view_collection = context.view_layer.layer_collection.children[collection.name]
-            if view_collection.hide_viewport == True or collection.hide_render == True:
+    if check_visibility:
+        for collection in obj.users_collection:
+            if collection.name in excluded_collections:
                 return
 
     armature = None
@@ -1055,7 +1134,8 @@ def ParseObject(operator,context,exported, obj, recurse = True, parent = None):
 
     shatter_name = obj.get("shatter_name", obj.name)
 
-    if obj.type == "LIGHT":
+    # Only assign the type when it differs, assigning it re-applies the definition.
+    if obj.type == "LIGHT" and obj.shatter_type != "light":
         obj.shatter_type = "light"
     
     if obj.type == "EMPTY":
@@ -1064,10 +1144,15 @@ def ParseObject(operator,context,exported, obj, recurse = True, parent = None):
 
             if len(obj.shatter_prefab) > 0:
                 # print("Prefab path: " + obj.shatter_prefab)
-                obj.shatter_type = "level"
+                if obj.shatter_type != "level":
+                    obj.shatter_type = "level"
+            elif context.scene.shatter_export_prefabs:
+                ExportPrefabInstance(operator,context,exported,obj)
+                return
             else:
+                # Members are placed by the instance, whether their own collection is visible doesn't matter.
                 for child in obj.instance_collection.objects:
-                    ParseObject(operator,context,exported,child, False, obj)
+                    ParseObject(operator,context,exported,child, False, obj, check_visibility=False)
                 return
             # print("End of Collection: " + obj.name)
         else:
@@ -1111,14 +1196,14 @@ def ParseObject(operator,context,exported, obj, recurse = True, parent = None):
             # Handle level UUIDs.
             entity["uuid"] = obj.shatter_uuid #"00000000-0000-0000-0000-000000000000"
 
+        if parent != None and "uuid" in entity:
+            entity["uuid"] = GetMemberUUID(parent, obj)
+
         undefined_type = entity["type"] not in context.scene.shatter_definitions
 
         should_export_transform = True
         if undefined_type == False:
-            definition = context.scene.shatter_definitions[entity["type"]]
-            for param in definition:
-                if param["key"] == "no_transform":
-                    should_export_transform = False
+            should_export_transform = not context.scene.shatter_schema[entity["type"]].no_transform
 
         # Fetch the mesh name if we're a mesh object.
         mesh_type = False
@@ -1127,6 +1212,10 @@ def ParseObject(operator,context,exported, obj, recurse = True, parent = None):
             # print("Mesh " + obj.data.name)
             entity["mesh"] = obj.data.name.lower()
             mesh_type = True
+
+            lods = generated_lods.get(entity["mesh"])
+            if lods:
+                entity["lods"] = lods
         elif undefined_type and obj.type == "LIGHT" and obj.data.type != "SUN":
             mesh_type = False
             light_type = True
@@ -1136,7 +1225,7 @@ def ParseObject(operator,context,exported, obj, recurse = True, parent = None):
             return
         
         if obj.shatter_type == "node" or obj.shatter_type == "rope":
-            ParseNode(obj,entity)
+            ParseNode(context,obj,entity)
 
         HasMaterial = False
         if not is_level and mesh_type and len(obj.material_slots) > 0:
@@ -1147,7 +1236,8 @@ def ParseObject(operator,context,exported, obj, recurse = True, parent = None):
         if not HasMaterial and not is_level and mesh_type:
             entity["shader"] = "DefaultGrid"
 
-            texture = GetTexture(obj)
+            with export_profiler.Phase("GetTexture", {"object" : obj.name}):
+                texture = GetTexture(obj)
             if texture != None:
                 entity["texture"] = texture['name']
                 entity["shader"] = "DefaultTextured"
@@ -1156,35 +1246,30 @@ def ParseObject(operator,context,exported, obj, recurse = True, parent = None):
 
             entity["shader"] = GetShader(obj,texture)
 
-        original_matrix = copy.deepcopy(obj.matrix_world)
-        original_color = obj.color
+        color = obj.color
         if parent != None:
-            obj.matrix_world = parent.matrix_world @ obj.matrix_world
-            obj.color[0] = parent.color[0]
-            obj.color[1] = parent.color[1]
-            obj.color[2] = parent.color[2]
-            obj.color[3] = parent.color[3]
+            color = parent.color
         
         if obj.parent:
             entity["parent"] = obj.parent.name;
 
         if should_export_transform:
-            position = copy.deepcopy(obj.location)
+            position, euler, scale = GetObjectTransform(obj, parent)
             
             entity["position"] = VectorToString(position)
             # entity["position"] = "0 0 0"
 
-            rotation = copy.deepcopy(obj.rotation_euler)
+            rotation = euler.copy()
 
-            rotation.x = degrees(obj.rotation_euler.y)
-            rotation.y = degrees(obj.rotation_euler.x)
-            rotation.z = degrees(obj.rotation_euler.z)
+            rotation.x = degrees(euler.y)
+            rotation.y = degrees(euler.x)
+            rotation.z = degrees(euler.z)
 
             entity["rotation"] = VectorToString(rotation)
             # entity["rotation"] = "0 0 0"
 
             if not light_type:
-                entity["scale"] = VectorToString(obj.scale)
+                entity["scale"] = VectorToString(scale)
 
         if not is_level and light_type and obj.data.type != "SUN":
             entity["light_type"] = light_types[obj.data.type]
@@ -1197,13 +1282,13 @@ def ParseObject(operator,context,exported, obj, recurse = True, parent = None):
                 entity["angle_outer"] = str(obj.data.spot_size)
 
         if not is_level and obj.shatter_type != "custom" and obj.type != "EMPTY" and not light_type:
-            if obj.color[3] > 200.0:
-                print("Light sphere value: " + Vector4ToString(obj.color))
+            if color[3] > 200.0:
+                print("Light sphere value: " + Vector4ToString(color))
 
-            if obj.color[3] != 1.0:
-                entity["color"] = Vector4ToString(obj.color)
+            if color[3] != 1.0:
+                entity["color"] = Vector4ToString(color)
             else:
-                entity["color"] = VectorToString(obj.color)
+                entity["color"] = VectorToString(color)
             entity["visible"] = "1" if obj.shatter_visible else "0"
             entity["collision"] = "1" if obj.shatter_collision else "0"
             entity["collisiontype"] = collision_types[obj.shatter_collision_type]
@@ -1253,15 +1338,208 @@ def ParseObject(operator,context,exported, obj, recurse = True, parent = None):
             if value != None:
                 entity[pair.name] = value
 
-        exported["entities"].append(entity)
+        if context.scene.shatter_export_incremental:
+            export_cache.StoreEntityFingerprint(entity)
+
+        with export_profiler.Phase("Serialize", {"object" : obj.name}):
+            exported["entities"].append(entity)
+
+def AddDefaultShaders(exported):
+    default_shader = {}
+    default_shader["type"] = "shader"
+    default_shader["name"] = "DefaultGrid"
+    default_shader["path"] = "Shaders/DefaultGrid"
+    exported["assets"].append(default_shader)
+
+    default_texture_shader = {}
+    default_texture_shader["type"] = "shader"
+    default_texture_shader["name"] = "DefaultTextured"
+    default_texture_shader["path"] = "Shaders/DefaultTextured"
+    exported["assets"].append(default_texture_shader)
+
+# Fingerprints everything in a collection that ends up in its prefab, nested instances include their own collection.
+def GetCollectionFingerprint(context, collection):
+    digest = hashlib.sha1()
+
+    scene = context.scene
+    export_cache.HashValue(digest, scene.shatter_definitions_signature)
+    export_cache.HashValue(digest, scene.shatter_mesh_format)
+    export_cache.HashValue(digest, scene.shatter_compact_nodes)
+    export_cache.HashValue(digest, (scene.shatter_export_lods, scene.shatter_lod_ratios, scene.shatter_lod_distances))
+    export_cache.HashValue(digest, GetBasePathRelative(context))
+
+    for obj in sorted(collection.objects, key=lambda item: item.name):
+        export_cache.HashValue(digest, obj.name)
+        export_cache.HashValue(digest, obj.type)
+        export_cache.HashValue(digest, obj.parent.name if obj.parent else "")
+        export_cache.HashValue(digest, [tuple(row) for row in obj.matrix_basis])
+        export_cache.HashValue(digest, tuple(obj.color))
 
-        obj.matrix_world = original_matrix
-        obj.color = original_color
+        for key, value in export_cache.GetEntityProperties(obj):
+            export_cache.HashValue(digest, key)
+            export_cache.HashValue(digest, value)
 
-def ExportObjects(operator,context):
-    objects = context.scene.objects
+        for pair in obj.shatter_key_values:
+            export_cache.HashValue(digest, pair.name)
+            export_cache.HashValue(digest, pair.value)
+
+        for prop in obj.shatter_properties:
+            export_cache.HashValue(digest, prop.name)
+            export_cache.HashValue(digest, GetPropertyValue(obj, prop))
+
+        if obj.type == "MESH":
+            export_cache.HashValue(digest, obj.data.name)
+            digest.update(export_cache.GetMeshFingerprint(context, GetExportDepsgraph(context), obj, GetTexture(obj)).encode("utf-8"))
+        elif obj.type == "LIGHT":
+            light = obj.data
+            export_cache.HashValue(digest, (light.type, tuple(light.color), light.energy, light.shadow_soft_size))
+            if light.type == "SPOT":
+                export_cache.HashValue(digest, (light.spot_size, light.spot_blend))
+        elif obj.type == "EMPTY" and obj.instance_type == "COLLECTION" and obj.instance_collection != None:
+            export_cache.HashValue(digest, tuple(obj.instance_collection.instance_offset))
+            digest.update(GetCollectionFingerprint(context, obj.instance_collection).encode("utf-8"))
+
+    return digest.hexdigest()
+
+# Exports an instanced collection to its own sub-level, every instance of it only references that level.
+# Returns the path of the prefab relative to the game directory, without the extension.
+def ExportPrefab(operator, context, collection):
+    prefab_path = exported_prefabs.get(collection.name_full)
+    if prefab_path != None:
+        return prefab_path
+
+    # Different collections can end up with the same clean name, such as "Rock.001" and "rock_001" or linked collections.
+    prefab_path = GetBasePathRelative(context) + "Prefabs/" + bpy.path.clean_name(collection.name).lower()
+    if prefab_path in prefab_owners:
+        prefab_path += "_" + hashlib.sha1(collection.name_full.encode("utf-8")).hexdigest()[:8]
+
+    full_path = os.path.normpath(bpy.path.abspath(context.scene.shatter_game_path)) + "/" + prefab_path + ".sls"
+    exported_prefabs[collection.name_full] = prefab_path
+    prefab_owners[prefab_path] = collection.name_full
+
+    with export_profiler.Phase("Fingerprint", {"collection" : collection.name}):
+        fingerprint = GetCollectionFingerprint(context, collection)
+
+    if prefab_cache.IsPrefabUnchanged(prefab_path, fingerprint, full_path):
+        print("Skipping unchanged prefab: " + prefab_path)
+        prefab_cache.StorePrefab(prefab_path, fingerprint)
+        return prefab_path
+
+    prefab = {
+        "version" : "0",
+        "uuid" : str( uuid.uuid5(uuid.NAMESPACE_URL, prefab_path) ),
+        "save" : "0",
+        "assets" : [],
+        "entities" : []
+    }
+    AddDefaultShaders(prefab)
+
+    # The prefab lists its own assets, so it starts out without any of the level's.
+    level_meshes = generated_meshes[:]
+    level_textures = generated_textures[:]
+    generated_meshes.clear()
+    generated_textures.clear()
+    try:
+        with export_profiler.Phase("Prefab", {"collection" : collection.name}):
+            # Prefab collections are usually hidden in the scene, only the export toggle of their members counts.
+            for obj in collection.objects:
+                ParseObject(operator,context,prefab,obj, check_visibility=False)
+    finally:
+        generated_meshes[:] = level_meshes
+        generated_textures[:] = level_textures
+
+    os.makedirs(os.path.dirname(full_path), exist_ok=True)
+    writer = LevelWriter(full_path)
+    writer.Begin(prefab)
+    for entity in prefab["entities"]:
+        writer.append(entity)
+    writer.Finish(prefab["assets"])
+
+    print("Exported prefab " + prefab_path + " (" + str(len(prefab["entities"])) + " entities)")
+    prefab_cache.StorePrefab(prefab_path, fingerprint)
+
+    prefab_asset = {}
+    prefab_asset["type"] = "level"
+    prefab_asset["name"] = prefab_path
+    prefab_asset["path"] = prefab_path + ".sls"
+    changed_assets.append(prefab_asset)
+
+    return prefab_path
+
+# Emits a lightweight level entity that places the prefab of an instanced collection.
+def ExportPrefabInstance(operator, context, exported, obj):
+    collection = obj.instance_collection
+    if collection == None:
+        return
+
+    prefab_path = ExportPrefab(operator, context, collection)
+
+    # Generate the unique identifier.
+    if len(obj.shatter_uuid) == 0:
+        obj.shatter_uuid = str( uuid.uuid4() )
+
+    entity = {}
+    entity["type"] = "level"
+    entity["path"] = prefab_path + ".sls"
+    entity["uuid"] = obj.shatter_uuid
+
+    if obj.parent:
+        entity["parent"] = obj.parent.name
+
+    # The prefab is exported in collection space, so the instance offset is applied to the instance instead.
+    position, euler, scale = GetObjectTransform(obj)
+    if collection.instance_offset.length > 0.0:
+        position, orientation, scale = (obj.matrix_basis @ Matrix.Translation(-collection.instance_offset)).decompose()
+        euler = orientation.to_euler(obj.rotation_euler.order, obj.rotation_euler)
+
+    rotation = euler.copy()
+    rotation.x = degrees(euler.y)
+    rotation.y = degrees(euler.x)
+    rotation.z = degrees(euler.z)
+
+    entity["position"] = VectorToString(position)
+    entity["rotation"] = VectorToString(rotation)
+    entity["scale"] = VectorToString(scale)
+
+    # Expanded instances tint their members with the instance color, the prefab level carries it instead.
+    if obj.color[3] != 1.0:
+        entity["color"] = Vector4ToString(obj.color)
+    else:
+        entity["color"] = VectorToString(obj.color)
+
+    if context.scene.shatter_export_incremental:
+        export_cache.StoreEntityFingerprint(entity)
+
+    with export_profiler.Phase("Serialize", {"object" : obj.name}):
+        exported["entities"].append(entity)
+
+# Exports the scene one object at a time, yielding the amount of processed objects, the total and the amount of assets after each one.
+def ExportObjectsIterator(operator,context, writer = None, cells = None):
+    # The object list is fixed up front, the scene may still change between steps of a modal export.
+    object_names = [obj.name for obj in context.scene.objects]
 
     ResetExporter()
+    with export_profiler.Phase("Visibility"):
+        GatherExcludedCollections(context.view_layer.layer_collection)
+
+    if context.scene.shatter_export_textures and context.scene.shatter_animation_only == False:
+        texture_cache.LoadTextureCache(context)
+
+    incremental = context.scene.shatter_export_incremental and context.scene.shatter_animation_only == False
+    if incremental:
+        export_cache.LoadExportCache(context)
+
+    prefabs = context.scene.shatter_export_prefabs and context.scene.shatter_animation_only == False
+    if prefabs:
+        prefab_cache.LoadPrefabCache(context)
+
+    lods = context.scene.shatter_export_lods and context.scene.shatter_export_meshes and context.scene.shatter_animation_only == False
+    if lods:
+        mesh_lods.LoadLODCache(context)
+
+        warning = mesh_lods.GetLODSettingsWarning(context)
+        if len(warning) > 0:
+            operator.report({"WARNING"}, warning)
 
     scene_id = str( uuid.uuid4() )
     if len(context.scene.shatter_uuid) > 0:
@@ -1274,9 +1552,13 @@ def ExportObjects(operator,context):
         "uuid" : scene_id,
         "save" : "1" if context.scene.shatter_allow_serialization else "0",
         "assets" : [],
-        "entities" : []
+        "entities" : writer if writer != None else []
     }
 
+    # Entities are streamed straight to the level file when a writer is supplied.
+    if writer != None:
+        writer.Begin(exported)
+
     # Don't export the sky assets and add it to the script if we're exporting in Bare mode.
     if context.scene.shatter_is_bare == False:
         sky_shader_asset = {}
@@ -1303,29 +1585,59 @@ def ExportObjects(operator,context):
         sky["uuid"] = "00000000-0000-0000-0000-000000000001"
         exported["entities"].append(sky)
 
-    default_shader = {}
-    default_shader["type"] = "shader"
-    default_shader["name"] = "DefaultGrid"
-    default_shader["path"] = "Shaders/DefaultGrid"
-    exported["assets"].append(default_shader)
-
-    default_texture_shader = {}
-    default_texture_shader["type"] = "shader"
-    default_texture_shader["name"] = "DefaultTextured"
-    default_texture_shader["path"] = "Shaders/DefaultTextured"
-    exported["assets"].append(default_texture_shader)
+    AddDefaultShaders(exported)
 
     if context.scene.shatter_animation_only == False:
         obj_index = 0 # Used to update the progress indicator.
-        for obj in objects:
-            ParseObject(operator,context,exported,obj)
+        for name in object_names:
+            obj = context.scene.objects.get(name)
+            if obj == None:
+                obj_index += 1
+                continue
+
+            with export_profiler.Phase("ParseObject", {"object" : obj.name}):
+                if cells != None:
+                    cells.SetObject(obj)
+
+                ParseObject(operator,context,exported,obj)
 
             # Update the progress indicator.
             obj_index += 1
-            bpy.context.window_manager.progress_update((obj_index / len(objects)) * 0.97)
+            export_profiler.RecordMemory()
+            yield obj_index, len(object_names), len(exported["assets"])
+
+            # A modal export continues in a later event, the context and depsgraph of the previous step may no longer be valid.
+            context = bpy.context
+            ClearExportDepsgraph()
+
+        # Wait for the background workers to finish the meshes that were handed off to them.
+        with export_profiler.Phase("Workers"):
+            finished_jobs = export_workers.RunJobs(operator, context)
+
+        # Only meshes that were actually written have to be reloaded by a running game.
+        for job in finished_jobs:
+            changed_assets.append(queued_assets.pop(job["asset"]))
+            if job["fingerprint"] != None:
+                export_cache.StoreMeshFingerprint(job["asset"], job["fingerprint"])
+
+        failed_assets.extend(queued_assets.keys())
+
+        with export_profiler.Phase("Texture copies"):
+            texture_cache.FinishTextureCopies(context)
 
         print("Configured " + str(len(exported["assets"])) + " assets.")
         print("Configured " + str(len(exported["entities"])) + " entities.")
+
+        if incremental:
+            print(str(len(export_cache.changed_entities)) + " entities changed since the last export.")
+            export_cache.SaveExportCache(context)
+
+        if prefabs:
+            print(str(len(exported_prefabs)) + " prefabs referenced by the level.")
+            prefab_cache.SavePrefabCache(context)
+
+        if lods:
+            mesh_lods.SaveLODCache(context)
     else:
          ExportAnimations(operator,context)
 
@@ -1337,34 +1649,241 @@ def ExportObjects(operator,context):
 
     return exported
 
+# Runs an export iterator to completion, returning its result.
+def RunExport(steps):
+    window_manager = bpy.context.window_manager
+    try:
+        while True:
+            done, total, assets = next(steps)
+            window_manager.progress_update((done / total) * 97.0)
+    except StopIteration as result:
+        return result.value
+
+def ExportObjects(operator,context, writer = None):
+    return RunExport(ExportObjectsIterator(operator, context, writer))
+
+# Seconds of work the modal export does per timer event before handing control back to the UI.
+export_time_slice = 0.05
+
+# Events that still reach the UI during a modal export, everything else could edit the scene while it's being exported.
+navigation_events = {
+    'MOUSEMOVE', 'INBETWEEN_MOUSEMOVE', 'MIDDLEMOUSE', 'WHEELUPMOUSE', 'WHEELDOWNMOUSE',
+    'TRACKPADPAN', 'TRACKPADZOOM', 'MOUSEROTATE', 'MOUSESMARTZOOM', 'NDOF_MOTION',
+    'NUMPAD_1', 'NUMPAD_2', 'NUMPAD_3', 'NUMPAD_4', 'NUMPAD_5', 'NUMPAD_6', 'NUMPAD_7', 'NUMPAD_8', 'NUMPAD_9',
+    'NUMPAD_PLUS', 'NUMPAD_MINUS', 'NUMPAD_PERIOD'
+}
+
+# Only one export can run at a time, they write to the same files.
+export_running = False
+
 class ExportScene(bpy.types.Operator):
     bl_idname = "shatter.export_scene"
     bl_label = "Export"
     bl_description = "Exports the current scene to a Shatter level file"
 
-    def execute(self,context):
-        bpy.context.window_manager.progress_begin(0, 100)
-
-        exported = ExportObjects(self,context)
+    def GetExportPath(self, context):
+        return context.scene.shatter_export_path + context.scene.name + ".sls"
 
+    def ReportResult(self, context, exported):
         if(len(exported) == 0):
             if context.scene.shatter_animation_only:
                 self.report({"INFO"}, "Exported animation only.")
             else:
                 self.report({"INFO"}, "Exported geometry only.")
-            return {'FINISHED'}
+            return
 
-        export_path = context.scene.shatter_export_path + context.scene.name + ".sls"
-        full_path = bpy.path.abspath(export_path)
-        self.report({"INFO"}, "Exporting level script to " + export_path)
+        self.report({"INFO"}, "Exported level script to " + self.GetExportPath(context))
 
-        export_file = open(full_path, 'w')
-        json.dump(exported, export_file, indent=4)
+    def execute(self,context):
+        global export_running
+        if export_running:
+            self.report({"ERROR"}, "An export is already running.")
+            return {'CANCELLED'}
+
+        export_running = True
+        bpy.context.window_manager.progress_begin(0, 100)
+
+        try:
+            exported = ExportLevel(self, context, bpy.path.abspath(self.GetExportPath(context)))
+        finally:
+            bpy.context.window_manager.progress_end()
+            export_running = False
+
+        self.ReportResult(context, exported)
+
+        return {'FINISHED'}
+
+    # Exporting from the UI is spread out over timer events so Blender stays responsive.
+    def invoke(self, context, event):
+        global export_running
+        if export_running:
+            self.report({"ERROR"}, "An export is already running.")
+            return {'CANCELLED'}
+
+        self.background = None
+        if context.scene.shatter_export_background:
+            return self.InvokeBackground(context)
+
+        export_running = True
+        self.steps = ExportLevelIterator(self, context, bpy.path.abspath(self.GetExportPath(context)))
+
+        window_manager = context.window_manager
+        window_manager.progress_begin(0, 100)
+        self.timer = window_manager.event_timer_add(0.01, window=context.window)
+        window_manager.modal_handler_add(self)
+
+        return {'RUNNING_MODAL'}
+
+    def InvokeBackground(self, context):
+        try:
+            self.background = BackgroundExport(context)
+        except Exception as e:
+            self.report({"ERROR"}, "Failed to start the background export. (" + str(e) + ")")
+            return {'CANCELLED'}
+
+        global export_running
+        export_running = True
+        self.report({"INFO"}, "Exporting " + self.background.scene + " in the background.")
+
+        window_manager = context.window_manager
+        self.timer = window_manager.event_timer_add(0.5, window=context.window)
+        window_manager.modal_handler_add(self)
+
+        return {'RUNNING_MODAL'}
+
+    # Waits for the background process without blocking any input.
+    def ModalBackground(self, context, event):
+        if event.type != 'TIMER' or self.background.IsRunning():
+            return {'PASS_THROUGH'}
+
+        global export_running
+        export_running = False
+        context.window_manager.event_timer_remove(self.timer)
 
-        bpy.context.window_manager.progress_end()
+        error = self.background.Finish()
+        if len(error) > 0:
+            self.report({"ERROR"}, "Background export of " + self.background.scene + " failed. (" + error + ")")
+            return {'CANCELLED'}
 
+        self.report({"INFO"}, "Background export finished in " + format(self.background.GetSeconds(), ".1f") + "s, level script written to " + self.background.export_path)
         return {'FINISHED'}
 
+    def Stop(self, context):
+        global export_running
+        export_running = False
+
+        window_manager = context.window_manager
+        window_manager.event_timer_remove(self.timer)
+        window_manager.progress_end()
+        if context.workspace != None:
+            context.workspace.status_text_set(None)
+
+    # Blender ends modal operators by itself when another file is loaded or the window is closed.
+    def cancel(self, context):
+        if self.background != None:
+            global export_running
+            export_running = False
+            context.window_manager.event_timer_remove(self.timer)
+            return
+
+        self.steps.close()
+        self.Stop(context)
+
+    def modal(self, context, event):
+        if self.background != None:
+            return self.ModalBackground(context, event)
+
+        if event.type == 'ESC':
+            # Closing the iterator removes the partially written level.
+            self.steps.close()
+            self.Stop(context)
+            self.report({"WARNING"}, "Export cancelled.")
+            return {'CANCELLED'}
+
+        if event.type in navigation_events:
+            return {'PASS_THROUGH'}
+
+        if event.type != 'TIMER':
+            return {'RUNNING_MODAL'}
+
+        deadline = time.perf_counter() + export_time_slice
+        try:
+            while time.perf_counter() < deadline:
+                done, total, assets = next(self.steps)
+        except StopIteration as result:
+            self.Stop(context)
+            self.ReportResult(context, result.value)
+            return {'FINISHED'}
+        except Exception as e:
+            self.Stop(context)
+            self.report({"ERROR"}, "Export failed. (" + str(e) + ")")
+            return {'CANCELLED'}
+
+        context.window_manager.progress_update((done / total) * 97.0)
+        context.workspace.status_text_set("Exporting object " + str(done) + " of " + str(total) + ", " + str(assets) + " assets. (Esc to cancel)")
+
+        return {'RUNNING_MODAL'}
+
+# Exports the scene, writing the level script to the given path if there is one to write.
+def ExportLevel(operator, context, full_path):
+    return RunExport(ExportLevelIterator(operator, context, full_path))
+
+def ExportLevelIterator(operator, context, full_path):
+    writer = None
+    if context.scene.shatter_animation_only == False and context.scene.shatter_no_script == False:
+        writer = LevelWriter(full_path)
+
+    # Large scenes can be split up into cells that the game streams in.
+    cells = None
+    if writer != None and context.scene.shatter_export_cells:
+        cell_directory = GetBasePathRelative(context) + context.scene.name + "_cells/"
+        cells = CellWriter(writer, full_path, cell_directory, context.scene.shatter_cell_size, level_cells.GetLinkedNames(context.scene.objects))
+
+    # The patch records the entities as they pass through to the writer.
+    patch = None
+    level_patch.last_patch_path = None
+    if writer != None and cells == None and context.scene.shatter_export_patch:
+        patch = LevelPatch(full_path, writer)
+
+    export_profiler.Begin(context.scene.shatter_export_profile, context.scene.shatter_export_profile_memory)
+
+    try:
+        entities = writer
+        if patch != None:
+            entities = patch
+        elif cells != None:
+            entities = cells
+
+        exported = yield from ExportObjectsIterator(operator, context, entities, cells)
+        context = bpy.context
+
+        if cells != None:
+            with export_profiler.Phase("Cells"):
+                cells.Finish(exported["assets"])
+        elif writer != None:
+            with export_profiler.Phase("Serialize", {"object" : "assets"}):
+                writer.Finish(exported["assets"])
+
+        if patch != None:
+            with export_profiler.Phase("Patch"):
+                patch.Finish(exported["assets"], changed_assets)
+    except:
+        # Never leave a partially written level behind, this includes cancelled exports and failures while finishing it.
+        if writer != None:
+            writer.Abort()
+        if cells != None:
+            cells.Abort()
+        export_workers.ResetJobs()
+        texture_cache.CancelTextureCopies()
+        export_profiler.Finish(os.path.splitext(full_path)[0] + ".trace.json")
+        raise
+
+    summary = export_profiler.Finish(os.path.splitext(full_path)[0] + ".trace.json")
+    if len(summary) > 0:
+        operator.report({"INFO"}, summary)
+
+    return exported
+
 def camera_position(matrix):
     """ From 4x4 matrix, calculate camera location """
     t = (matrix[0][3], matrix[1][3], matrix[2][3])
@@ -1385,6 +1904,52 @@ def camera_position(matrix):
     )
     return output
 
+# Returns the camera location and direction of a 3D view in the convention the game expects.
+def GetViewPose(region_3d):
+    camera_location = camera_position(region_3d.view_matrix)
+    camera_direction = region_3d.view_rotation.to_euler('XYZ')
+
+    camera_direction.x = degrees(camera_direction.y)
+    camera_direction.y = degrees(camera_direction.x)
+    camera_direction.z = degrees(camera_direction.z)
+
+    return camera_location, camera_direction
+
+# Fetch view space coordinates for camera placement.
+def GetViewCamera(context):
+    camera_location = (0,0,0)
+    camera_direction = (0,0,0)
+    for area in context.window.screen.areas:
+        if area.type == "VIEW_3D":
+            camera_location, camera_direction = GetViewPose(area.spaces[0].region_3d)
+
+    x = round(camera_location[0],3)
+    y = round(camera_location[1],3)
+    z = round(camera_location[2],3)
+    print("Location x " + str(x) + " y " + str(y) + " z " + str(z))
+
+    print("Direction " + str(camera_direction))
+
+    dirx = round(camera_direction[0],3)
+    diry = round(camera_direction[1],3)
+    dirz = round(camera_direction[2],3)
+
+    return (x, y, z), (dirx, diry, dirz)
+
+def GetWorldPath(context):
+    level_path = context.scene.shatter_export_path.removeprefix(context.scene.shatter_game_path)
+    return level_path + context.scene.name
+
+# Connects to the game if live link is enabled and the game is running.
+def ConnectLiveLink(context):
+    if context.scene.shatter_live_link == False:
+        return False
+
+    if live_link.connection.IsConnected():
+        return True
+
+    return live_link.connection.Connect(context.scene.shatter_live_link_port)
+
 class RunWorld(bpy.types.Operator):
     bl_idname = "shatter.run_world"
     bl_label = "Run"
@@ -1395,21 +1960,20 @@ class RunWorld(bpy.types.Operator):
             self.report({"WARNING"}, "No game path or executable specified.")
             return {'FINISHED'}
         
+        camera_location, camera_direction = GetViewCamera(context)
+
+        # Reuse the game that is already running instead of starting a new one.
+        if ConnectLiveLink(context):
+            connection = live_link.connection
+            if connection.SendReloadLevel(GetWorldPath(context)) and connection.SendCamera(camera_location, camera_direction, context.scene.shatter_moveplayer):
+                self.report({"INFO"}, "Reloaded the world in the running game.")
+                return {'FINISHED'}
+
         full_path = bpy.path.abspath(context.scene.shatter_game_path + context.scene.shatter_game_executable + ".exe")
         working_directory = bpy.path.abspath(context.scene.shatter_game_path)
 
-        # Fetch view space coordinates for camera placement.
-        camera_location = (0,0,0)
-        camera_direction = (0,0,0)
-        for area in context.window.screen.areas:
-            if area.type == "VIEW_3D":
-                camera_location = camera_position(area.spaces[0].region_3d.view_matrix)
-                camera_direction = area.spaces[0].region_3d.view_rotation.to_euler('XYZ')
-
-        x = round(camera_location[0],3)
-        y = round(camera_location[1],3)
-        z = round(camera_location[2],3)
-        print("Location x " + str(x) + " y " + str(y) + " z " + str(z))
+        x, y, z = camera_location
+        dirx, diry, dirz = camera_direction
 
         x = str(x)
         y = str(y)
@@ -1420,16 +1984,6 @@ class RunWorld(bpy.types.Operator):
         y = y.replace("-", "+")
         z = z.replace("-", "+")
 
-        camera_direction.x = degrees(camera_direction.y)
-        camera_direction.y = degrees(camera_direction.x)
-        camera_direction.z = degrees(camera_direction.z)
-
-        print("Direction " + str(camera_direction))
-
-        dirx = round(camera_direction[0],3)
-        diry = round(camera_direction[1],3)
-        dirz = round(camera_direction[2],3)
-
         dirx = str(dirx)
         diry = str(diry)
         dirz = str(dirz)
@@ -1439,11 +1993,9 @@ class RunWorld(bpy.types.Operator):
         diry = diry.replace("-", "+")
         dirz = dirz.replace("-", "+")
 
-        level_path = context.scene.shatter_export_path.removeprefix(context.scene.shatter_game_path)
-
         command_list = [
             full_path, 
-            "-world",level_path + context.scene.name, 
+            "-world",GetWorldPath(context), 
             "-x", x, "-y", y, "-z", z,
             "-dirx", dirx, "-diry", diry, "-dirz", dirz
         ]
@@ -1451,6 +2003,10 @@ class RunWorld(bpy.types.Operator):
         if(context.scene.shatter_moveplayer == True):
             command_list.append("-moveplayer")
 
+        # The game listens for the editor, it's connected to on the next run.
+        if(context.scene.shatter_live_link == True):
+            command_list.extend(["-livelink", str(context.scene.shatter_live_link_port)])
+
         subprocess.Popen(command_list, cwd=working_directory)
 
         return {'FINISHED'}
@@ -1462,6 +2018,19 @@ class ExportAndRunWorld(bpy.types.Operator):
 
     def execute(self,context):
         bpy.ops.shatter.export_scene()
+
+        if ConnectLiveLink(context):
+            # A patch already lists the assets that have to be reloaded.
+            if level_patch.last_patch_path != None:
+                camera_location, camera_direction = GetViewCamera(context)
+                connection = live_link.connection
+                if connection.SendApplyPatch(GetWorldPath(context) + ".patch.json") and connection.SendCamera(camera_location, camera_direction, context.scene.shatter_moveplayer):
+                    self.report({"INFO"}, "Sent the level patch to the running game.")
+                    return {'FINISHED'}
+
+            for asset in changed_assets:
+                live_link.connection.SendReloadAsset(asset)
+
         bpy.ops.shatter.run_world()
 
         return {'FINISHED'}
@@ -1492,6 +2061,46 @@ class SLS_PT_ShatterScene(bpy.types.Panel):
         #row = layout.row()
         row.prop(scene, "shatter_export_textures")
 
+        row = layout.row()
+        row.prop(scene, "shatter_mesh_format")
+        row.enabled = scene.shatter_export_meshes and scene.shatter_animation_only == False
+
+        row = layout.row()
+        row.prop(scene, "shatter_export_incremental")
+        row.prop(scene, "shatter_export_workers")
+        row.enabled = scene.shatter_animation_only == False
+
+        row = layout.row()
+        row.prop(scene, "shatter_export_profile")
+        memory = row.row()
+        memory.prop(scene, "shatter_export_profile_memory")
+        memory.enabled = scene.shatter_export_profile
+        row.prop(scene, "shatter_export_background")
+
+        row = layout.row()
+        row.prop(scene, "shatter_compact_nodes")
+        patch = row.row()
+        patch.prop(scene, "shatter_export_patch")
+        patch.enabled = scene.shatter_export_cells == False
+        row.prop(scene, "shatter_export_prefabs")
+        row.enabled = scene.shatter_no_script == False and scene.shatter_animation_only == False
+
+        row = layout.row()
+        row.prop(scene, "shatter_export_lods")
+        row.prop(scene, "shatter_lod_ratios")
+        row.prop(scene, "shatter_lod_distances")
+        row.enabled = scene.shatter_animation_only == False
+
+        row = layout.row()
+        row.prop(scene, "shatter_export_cells")
+        row.prop(scene, "shatter_cell_size")
+        row.enabled = scene.shatter_no_script == False and scene.shatter_animation_only == False
+
+        # Patches only describe the root level, the entities in the cells would never be patched.
+        if scene.shatter_export_cells and scene.shatter_export_patch:
+            row = layout.row()
+            row.label(text="Patches are not written when the level is split into cells.", icon="INFO")
+
         row = layout.row()
         row.prop(scene, "shatter_is_bare")
         row.enabled = scene.shatter_no_script == False and scene.shatter_animation_only == False
@@ -1514,6 +2123,15 @@ class SLS_PT_ShatterScene(bpy.types.Panel):
         opt = col.row()
         opt.prop(scene, "shatter_moveplayer")
 
+        opt = col.row()
+        opt.prop(scene, "shatter_live_link")
+        opt.prop(scene, "shatter_live_link_port")
+
+        opt = col.row()
+        opt.prop(scene, "shatter_stream_camera")
+        opt.prop(scene, "shatter_stream_rate")
+        opt.enabled = scene.shatter_live_link
+
         # Editor options
         col = row.column(align=True)
         opt = col.row()
@@ -1522,6 +2140,9 @@ class SLS_PT_ShatterScene(bpy.types.Panel):
         opt = col.row()
         opt.prop(scene, "shatter_links_drawall")
 
+        opt = col.row()
+        opt.prop(scene, "shatter_labels_maximum")
+
         row = layout.row()
         row.operator("shatter.export_scene", icon="EXPORT")
 
@@ -1576,42 +2197,33 @@ def ApplyDefinition(obj, clear=True):
 
     type = obj.shatter_type
 
-    if type not in bpy.types.Scene.shatter_definitions:
+    schema = bpy.types.Scene.shatter_schema.get(type)
+    if schema == None:
         if clear == True:
             obj.shatter_properties.clear()
         return
 
     if clear == True:
         obj.shatter_properties.clear()
-
-    definitions = bpy.types.Scene.shatter_definitions[type]
-
-    # Check which definitions are missing.
-    # Copy the existing property names.
-    existing_names = [prop.name for prop in obj.shatter_properties]
-
-    # Get all of the definitions that aren't already defined in the shatter_properties collection.
-    missing_definitions = [definition for definition in definitions if definition["key"] not in existing_names]
-
-    # If we're not clearing, make sure to purge orphaned properties.
-    if clear == False:
-        accounted_props = []
-        for definition in definitions:
-            for prop in obj.shatter_properties:
-                if definition["key"] == prop.name and definition["type"] == prop.type:
-                    accounted_props.append(prop.name)
-
-        unaccounted_props = []
-        for prop in obj.shatter_properties:
-            if prop.name not in accounted_props:
-                unaccounted_props.append(prop.name)
-
-        for prop in unaccounted_props:
-            index = obj.shatter_properties.find(prop)
-            if index > -1:
-                obj.shatter_properties.remove(index)
-
-    for definition in missing_definitions:
+    else:
+        # If we're not clearing, make sure to purge orphaned properties and update changed subtypes.
+        # Remove them back to front so the remaining indices stay valid.
+        properties = obj.shatter_properties
+        for index in reversed(range(len(properties))):
+            prop = properties[index]
+            definition = schema.properties.get((prop.name, prop.type))
+            if definition == None:
+                properties.remove(index)
+            elif prop.subtype != definition.get("subtype", ""):
+                prop.subtype = definition.get("subtype", "")
+
+    # Add all of the definitions that aren't already defined in the shatter_properties collection.
+    existing_names = {prop.name for prop in obj.shatter_properties}
+    for definition in schema.definitions:
+        if definition["key"] in existing_names:
+            continue
+
+        existing_names.add(definition["key"])
         item = obj.shatter_properties.add()
         item.name = definition["key"]
         item.type = definition["type"]
@@ -1622,11 +2234,16 @@ def ApplyDefinition(obj, clear=True):
 def OnTypeUpdate(self,context):
     ApplyDefinition(self)
 
+# Signature of the definitions that the current schema was built from.
+loaded_definitions = None
+
 class LoadDefinitions(bpy.types.Operator):
     bl_idname = "shatter.load_definitions"
     bl_label = "Reload Definitions"
     bl_description = "Loads entity definitions if available."
 
+    force : BoolProperty(name="Force", description="Read and apply the definitions even if they didn't change", default=False, options={'SKIP_SAVE'})
+
     # These are protected key names that should not be overwritten.
     # Fields that use these names are ignored.
     filtered_keys = ["name", "help", "transform", "inputs", "outputs"]
@@ -1634,6 +2251,7 @@ class LoadDefinitions(bpy.types.Operator):
     entity_types = []
     native_types = 0
     entity_meta = {} # Property information.
+    previous_schema = None # Schema the scene's objects were last updated with.
 
     def SeedTypes(self):
         self.entity_types = []
@@ -1649,12 +2267,14 @@ class LoadDefinitions(bpy.types.Operator):
         if bpy.types.Scene.shatter_definitions:
             del bpy.types.Scene.shatter_definitions
         bpy.types.Scene.shatter_definitions = self.entity_meta
+        bpy.types.Scene.shatter_schema = entity_schema.CompileDefinitions(self.entity_meta)
+        link_overlay.MarkDirty()
 
         additional_types = len(self.entity_types) - self.native_types
         print(str(additional_types) + " additional types found.")
         print(str(len(self.entity_meta)) + " meta types.")
 
-    def Finish(self, context):
+    def Finish(self, context, signature):
         self.ApplyTypes()
         
         # Add the entity types to the object types list
@@ -1680,8 +2300,32 @@ class LoadDefinitions(bpy.types.Operator):
 
         self.ApplyDefinitions(context)
 
+        # Only remember the definitions once they were applied, a failed load is tried again next time.
+        global loaded_definitions
+        loaded_definitions = signature
+        context.scene.shatter_definitions_signature = signature
+
+    # Reloading from the UI always reads the definitions again.
+    def invoke(self, context, event):
+        self.force = True
+        return self.execute(context)
+
     def execute(self,context):
         definitions_path = bpy.path.abspath(context.scene.shatter_game_path + "Definitions.fgd")
+        try:
+            signature, definitions = entity_schema.LoadDefinitionsFile(definitions_path, self.force)
+        except Exception as e:
+            self.report({"ERROR"}, "Failed to load definitions. (" + str(e) + ")")
+            return {'CANCELLED'}
+
+        # Nothing to do if these definitions are already loaded and applied to this scene.
+        if not self.force and signature == loaded_definitions and signature == context.scene.shatter_definitions_signature:
+            return {'FINISHED'}
+
+        # Objects in this scene only need updating for the types that changed, as long as they match the current schema.
+        self.previous_schema = None
+        if not self.force and loaded_definitions != None and loaded_definitions == context.scene.shatter_definitions_signature:
+            self.previous_schema = bpy.types.Scene.shatter_schema
 
         # Add the default Shatter types.
         self.SeedTypes()
@@ -1693,90 +2337,99 @@ class LoadDefinitions(bpy.types.Operator):
         self.entity_meta["mesh"] = []
         self.entity_meta["mesh"].append({"key" : "outputs", "type" : "entities", "debug_color" : (0.6, 0.1, 0.0, 1.0)})
 
-        if not os.path.isfile(definitions_path):
+        if definitions == None:
             print("No definitions file found. (" + definitions_path + ")")
-            self.Finish(context)
+            self.Finish(context, signature)
             return {'FINISHED'}
 
-        with open(definitions_path) as definition_file:
-            print("Loading definitions. (" + definitions_path + ")")
-            definitions = json.load(definition_file)
-            if "types" in definitions:
-                for item in definitions["types"]:
-                    if "name" in item:
-                        # Check if a description/help field was included.
-                        description = item["help"] if "help" in item else ""
+        if "types" in definitions:
+            for item in definitions["types"]:
+                if "name" in item:
+                    # Check if a description/help field was included.
+                    description = item["help"] if "help" in item else ""
 
-                        # Add the entity's name to the type array.
-                        self.entity_types.append((item["name"],item["name"].capitalize(), description))
+                    # Add the entity's name to the type array.
+                    self.entity_types.append((item["name"],item["name"].capitalize(), description))
 
-                        if item["name"] not in self.entity_meta:
-                            self.entity_meta[item["name"]] = []
+                    if item["name"] not in self.entity_meta:
+                        self.entity_meta[item["name"]] = []
 
-                        # Get all the additional properties.
-                        for meta in item.items():
-                            data = {}
+                    # Get all the additional properties.
+                    for meta in item.items():
+                        data = {}
 
-                            key = meta[0]
-                            type = meta[1]
+                        key = meta[0]
+                        type = meta[1]
 
-                            if key in self.filtered_keys:
-                                continue
+                        if key in self.filtered_keys:
+                            continue
 
-                            data["key"] = key
+                        data["key"] = key
 
-                            type_info = type.split(',', 1)
-                            data["type"] = type_info[0]
+                        type_info = type.split(',', 1)
+                        data["type"] = type_info[0]
 
-                            if len(type_info) > 1:
-                                if data["type"] == "entities" or data["type"] == "entity":
-                                    colors = type_info[1].lstrip('(').rstrip(')').split(',')
-                                    colors = [float(c) for c in colors]
+                        if len(type_info) > 1:
+                            if data["type"] == "entities" or data["type"] == "entity":
+                                colors = type_info[1].lstrip('(').rstrip(')').split(',')
+                                colors = [float(c) for c in colors]
 
-                                    if len(colors) == 3:
-                                        colors.append(1.0)
+                                if len(colors) == 3:
+                                    colors.append(1.0)
 
-                                    data["debug_color"] = tuple(colors)
-                                elif data["type"] == "string":
-                                    if type_info[1] == "dir":
-                                        data["subtype"] = "dir"
-                                    elif type_info[1] == "file":
-                                        data["subtype"] = "file"
+                                data["debug_color"] = tuple(colors)
+                            elif data["type"] == "string":
+                                if type_info[1] == "dir":
+                                    data["subtype"] = "dir"
+                                elif type_info[1] == "file":
+                                    data["subtype"] = "file"
 
-                            self.entity_meta[item["name"]].append(data)
+                        self.entity_meta[item["name"]].append(data)
 
-                        # Add outputs field
-                        if "outputs" in item:
-                            if item["name"] not in self.entity_meta:
-                                    self.entity_meta[item["name"]] = []
-                        
-                            # Output list
-                            self.entity_meta[item["name"]].append({"key" : "outputs", "type" : "entities", "debug_color" : (0.6, 0.1, 0.0, 1.0)})
+                    # Add outputs field
+                    if "outputs" in item:
+                        if item["name"] not in self.entity_meta:
+                                self.entity_meta[item["name"]] = []
+                    
+                        # Output list
+                        self.entity_meta[item["name"]].append({"key" : "outputs", "type" : "entities", "debug_color" : (0.6, 0.1, 0.0, 1.0)})
 
-                            # Output meta-data
-                            for output in item["outputs"]:
-                                self.entity_meta[item["name"]].append({"key" : output, "type" : "output"})
+                        # Output meta-data
+                        for output in item["outputs"]:
+                            self.entity_meta[item["name"]].append({"key" : output, "type" : "output"})
 
-                        if "inputs" in item:
-                            if item["name"] not in self.entity_meta:
-                                    self.entity_meta[item["name"]] = []
+                    if "inputs" in item:
+                        if item["name"] not in self.entity_meta:
+                                self.entity_meta[item["name"]] = []
 
-                            # Input meta-data
-                            for input in item["inputs"]:
-                                self.entity_meta[item["name"]].append({"key" : input, "type" : "input"})
+                        # Input meta-data
+                        for input in item["inputs"]:
+                            self.entity_meta[item["name"]].append({"key" : input, "type" : "input"})
 
-                        if "transform" in item and item["transform"] == False:
-                            if item["name"] not in self.entity_meta:
-                                    self.entity_meta[item["name"]] = []
-                        
-                            self.entity_meta[item["name"]].append({"key" : "no_transform", "type" : "no_transform"})
+                    if "transform" in item and item["transform"] == False:
+                        if item["name"] not in self.entity_meta:
+                                self.entity_meta[item["name"]] = []
+                    
+                        self.entity_meta[item["name"]].append({"key" : "no_transform", "type" : "no_transform"})
 
-        self.Finish(context)
+        self.Finish(context, signature)
 
         return {'FINISHED'} 
 
     def ApplyDefinitions(self, context):
+        if self.previous_schema == None:
+            for obj in context.scene.objects:
+                ApplyDefinition(obj, False)
+            return
+
+        changed_types = entity_schema.GetChangedTypes(self.previous_schema, bpy.types.Scene.shatter_schema)
+        print(str(len(changed_types)) + " types changed.")
+
+        if len(changed_types) == 0:
+            return
+
         for obj in context.scene.objects:
+            if obj.shatter_type in changed_types:
                 ApplyDefinition(obj, False)
 
 
@@ -1881,6 +2534,28 @@ def RegisterScenePanels():
     Scene.shatter_game_executable = StringProperty(name="Game Executable",description="Name of the game's executable")
     Scene.shatter_export_meshes = BoolProperty(name="Meshes",description="Determines whether meshes should be exported",default=True)
     Scene.shatter_export_textures = BoolProperty(name="Textures",description="Determines whether textures should be exported",default=True)
+    Scene.shatter_mesh_format = EnumProperty(
+        items=(
+            ("fbx", "FBX", "Export meshes as FBX files"),
+            ("native", "Shatter Native", "Write static meshes as indexed binary files that the engine can load directly, skinned meshes are still exported as FBX")
+        ),
+        name="Mesh Format",
+        description="File format that is used for exported meshes"
+        )
+    Scene.shatter_export_incremental = BoolProperty(name="Incremental",description="Only re-export meshes and textures that changed since the last export",default=False)
+    Scene.shatter_export_workers = IntProperty(name="Workers",description="Number of background Blender processes used to export meshes, meshes are exported one by one when set to 0",default=0,min=0,soft_max=32)
+
+    Scene.shatter_export_profile = BoolProperty(name="Profile",description="Time every export phase and write a Chrome trace file next to the level file",default=False)
+    Scene.shatter_export_profile_memory = BoolProperty(name="Memory",description="Also track Python memory while profiling, this slows down the export and skews the timings",default=False)
+    Scene.shatter_export_background = BoolProperty(name="Background",description="Export a snapshot of the current file in a separate Blender process while you keep working",default=False)
+    Scene.shatter_export_lods = BoolProperty(name="LODs",description="Export decimated versions of every mesh and let entities switch to them based on distance",default=False)
+    Scene.shatter_lod_ratios = StringProperty(name="Ratios",description="Decimation ratio of every LOD level, separated by spaces",default="0.5 0.25")
+    Scene.shatter_lod_distances = StringProperty(name="Distances",description="Distance at which every LOD level is switched to, separated by spaces",default="25 50")
+    Scene.shatter_export_cells = BoolProperty(name="Cells",description="Split the level into a grid of sub-levels that the game can stream in, the main level references every cell",default=False)
+    Scene.shatter_cell_size = FloatProperty(name="Cell Size",description="Width and depth of a cell, objects that are larger than a cell stay in the main level",default=128.0,min=1.0,soft_max=4096.0,subtype="DISTANCE")
+    Scene.shatter_export_prefabs = BoolProperty(name="Prefabs",description="Export instanced collections once as cached prefab levels, instances only reference them",default=False)
+    Scene.shatter_export_patch = BoolProperty(name="Patch",description="Also write a patch with the entities and assets that changed since the previous export, so a running game can update the level without reloading it",default=False)
+    Scene.shatter_compact_nodes = BoolProperty(name="Compact Nodes",description="Export node and rope geometry as flat number arrays instead of text",default=False)
 
     Scene.shatter_is_bare = BoolProperty(name="Bare",description="Bare files don't include things like the sky mesh by default",default=True)
     Scene.shatter_allow_serialization = BoolProperty(name="Serialization",description="Allows this level to write save files",default=True)
@@ -1888,16 +2563,23 @@ def RegisterScenePanels():
     Scene.shatter_animation_only = BoolProperty(name="Animation Only",description="Export just animation data",default=False)
 
     Scene.shatter_uuid = StringProperty(name="UUID",description="Unique identifier for the Shatter engine.")
+    Scene.shatter_definitions_signature = StringProperty(name="Definitions Signature",description="Content hash of the definitions that were last applied to this scene")
 
     Scene.shatter_definitions = []
+    Scene.shatter_schema = {}
     Scene.shatter_previous_object = None
 
     Scene.shatter_object_types = CollectionProperty(type = KeyValueItem)
 
     # Additional startup options
     Scene.shatter_moveplayer = BoolProperty(name="Move Player",description="Move the player to the viewport location",default=False)
+    Scene.shatter_live_link = BoolProperty(name="Live Link",description="Keep the game running and reload the world through a local connection instead of relaunching it",default=False)
+    Scene.shatter_live_link_port = IntProperty(name="Port",description="Local port the game listens on for live link connections",default=live_link.default_port,min=1024,max=65535)
+    Scene.shatter_stream_camera = BoolProperty(name="Stream Camera",description="Continuously send the viewport camera to the running game",default=False,update=camera_stream.OnStreamUpdate)
+    Scene.shatter_stream_rate = IntProperty(name="Rate",description="Maximum number of camera updates sent per second",default=30,min=1,max=120)
 
     # Editor options
+    Scene.shatter_labels_maximum = IntProperty(name="Maximum Labels",description="Maximum amount of link labels that are drawn in the viewport, the closest labels are drawn first",default=64,min=0,soft_max=512)
     Scene.shatter_links_drawall = BoolProperty(name="Always show links",description="Displays links for every object, when disabled it only shows links for selected objects",default=True)
 
     # Register object properties.
@@ -1970,8 +2652,8 @@ def RegisterScenePanels():
     Material = bpy.types.Material
     Material.shatter_material = StringProperty(name="Material",description="Name that is used to refer to this material within the engine itself")
 
-    Scene.DrawHandler = bpy.types.SpaceView3D.draw_handler_add(DrawEntityLinks, (), 'WINDOW', 'POST_VIEW')
-    Scene.TextHandler = bpy.types.SpaceView3D.draw_handler_add(DrawEntityTexts, (), 'WINDOW', 'POST_PIXEL')
+    Scene.DrawHandler, Scene.TextHandler = link_overlay.RegisterLinkOverlay()
+    camera_stream.RegisterCameraStream()
 
     bpy.app.handlers.load_post.append(InitializeDefinitions)
 
@@ -1989,8 +2671,9 @@ def UnregisterScenePanels():
 
     Scene = bpy.types.Scene
 
-    bpy.types.SpaceView3D.draw_handler_remove(Scene.DrawHandler, 'WINDOW')
-    bpy.types.SpaceView3D.draw_handler_remove(Scene.TextHandler, 'WINDOW')
+    link_overlay.UnregisterLinkOverlay(Scene.DrawHandler, Scene.TextHandler)
+    camera_stream.UnregisterCameraStream()
+    live_link.connection.Close()
 
     # Unregister scene panel properties.
     del Scene.shatter_export_path
@@ -1998,6 +2681,21 @@ def UnregisterScenePanels():
     del Scene.shatter_game_executable
     del Scene.shatter_export_meshes
     del Scene.shatter_export_textures
+    del Scene.shatter_mesh_format
+    del Scene.shatter_export_incremental
+    del Scene.shatter_export_workers
+
+    del Scene.shatter_export_profile
+    del Scene.shatter_export_profile_memory
+    del Scene.shatter_export_background
+    del Scene.shatter_compact_nodes
+    del Scene.shatter_export_patch
+    del Scene.shatter_export_prefabs
+    del Scene.shatter_export_cells
+    del Scene.shatter_export_lods
+    del Scene.shatter_lod_ratios
+    del Scene.shatter_lod_distances
+    del Scene.shatter_cell_size
 
     del Scene.shatter_is_bare
     del Scene.shatter_allow_serialization
@@ -2005,13 +2703,20 @@ def UnregisterScenePanels():
     del Scene.shatter_animation_only
 
     del Scene.shatter_uuid
+    del Scene.shatter_definitions_signature
 
     del Scene.shatter_definitions
+    del Scene.shatter_schema
     del Scene.shatter_previous_object
     del Scene.shatter_object_types
 
     del Scene.shatter_moveplayer
+    del Scene.shatter_live_link
+    del Scene.shatter_live_link_port
+    del Scene.shatter_stream_camera
+    del Scene.shatter_stream_rate
     del Scene.shatter_links_drawall
+    del Scene.shatter_labels_maximum
 
     Object = bpy.types.Object
 
@@ -0,0 +1,130 @@
+import os
+import shutil
+import hashlib
+from concurrent.futures import ThreadPoolExecutor
+
+import bpy
+
+from . import export_profiler
+from . import json_cache
+
+cache_version = 1
+
+copy_threads = 4
+
+# Source information of every texture that was copied, keyed by the output path.
+copied_textures = {}
+
+executor = None
+pending_copies = []
+
+def GetCachePath(context):
+    return os.path.normpath(bpy.path.abspath(context.scene.shatter_game_path)) + "/ShatterTextures.cache"
+
+def LoadTextureCache(context):
+    global executor
+
+    copied_textures.clear()
+    pending_copies.clear()
+    executor = ThreadPoolExecutor(max_workers=copy_threads)
+
+    cache = json_cache.LoadCache(GetCachePath(context), cache_version, "texture cache")
+    if cache != None:
+        copied_textures.update(cache.get("textures", {}))
+
+def SaveTextureCache(context):
+    json_cache.SaveCache(GetCachePath(context), cache_version, "texture cache", {
+        "textures" : copied_textures
+    })
+
+def HashFile(path):
+    digest = hashlib.sha1()
+    with open(path, 'rb') as source:
+        for chunk in iter(lambda: source.read(1 << 20), b""):
+            digest.update(chunk)
+
+    return digest.hexdigest()
+
+def IsTextureUnchanged(input_path, output_path):
+    entry = copied_textures.get(output_path)
+    if entry == None or entry["source"] != input_path:
+        return False
+
+    if not os.path.isfile(output_path):
+        return False
+
+    stat = os.stat(input_path)
+    if stat.st_size != entry["size"]:
+        return False
+
+    if stat.st_mtime_ns == entry["mtime"]:
+        return True
+
+    # The file was touched, only copy it again if its contents actually changed.
+    if HashFile(input_path) != entry["hash"]:
+        return False
+
+    entry["mtime"] = stat.st_mtime_ns
+    return True
+
+def CopyTexture(input_path, output_path):
+    with export_profiler.Phase("CopyTexture", {"texture" : output_path}):
+        return CopyTextureFile(input_path, output_path)
+
+def CopyTextureFile(input_path, output_path):
+    os.makedirs(os.path.dirname(output_path), exist_ok=True)
+
+    # Hash the texture while copying it so it doesn't have to be read twice.
+    digest = hashlib.sha1()
+    with open(input_path, 'rb') as source, open(output_path, 'wb') as destination:
+        for chunk in iter(lambda: source.read(1 << 20), b""):
+            digest.update(chunk)
+            destination.write(chunk)
+    shutil.copymode(input_path, output_path)
+
+    stat = os.stat(input_path)
+    return {
+        "source" : input_path,
+        "size" : stat.st_size,
+        "mtime" : stat.st_mtime_ns,
+        "hash" : digest.hexdigest()
+    }
+
+# Returns whether the texture has to be copied.
+def QueueTextureCopy(input_path, output_path):
+    if IsTextureUnchanged(input_path, output_path):
+        print("Skipping unchanged texture: " + output_path)
+        return False
+
+    pending_copies.append((output_path, executor.submit(CopyTexture, input_path, output_path)))
+    return True
+
+def FinishTextureCopies(context):
+    global executor
+
+    if executor == None:
+        return
+
+    for output_path, copy in pending_copies:
+        try:
+            copied_textures[output_path] = copy.result()
+        except Exception as e:
+            copied_textures.pop(output_path, None)
+            print("Failed to export texture. (" + str(e) + ")")
+
+    pending_copies.clear()
+    executor.shutdown()
+    executor = None
+
+    SaveTextureCache(context)
+
+def CancelTextureCopies():
+    global executor
+
+    if executor == None:
+        return
+
+    # Copies that already started are finished, so no half-written textures are left behind.
+    executor.shutdown(wait=True, cancel_futures=True)
+    executor = None
+    pending_copies.clear()